@@ -0,0 +1,180 @@
+import multiprocessing
+import struct
+import threading
+import time
+from multiprocessing import shared_memory
+
+from serial_reader import read_from_serial, find_fits_in_selected_row
+from decoders import (
+    create_decoder,
+    normalize_unit,
+    Reading,
+    UNIT_CODES,
+    UNIT_CODE_BY_NAME,
+    FLAG_TRACK,
+    DEFAULT_DECODER
+)
+
+# Ring header: number of readings published so far, capacity in records.
+RING_HEADER = struct.Struct("<QQ")
+RING_HEADER_SIZE = 64
+WRITE_SEQ = struct.Struct("<Q")
+
+# Reading record: seq (1-based, 0 = never written), perf_counter at receipt and after
+# decoding, torque, device timestamp (NaN if none), unit code, flags, number of matching
+# allowances, matching allowance indices ordered by closeness.
+READING = struct.Struct("<QddddBBB3B2x")
+
+DEFAULT_RING_CAPACITY = 4096
+
+
+class ReadingRing:
+    """
+    Single-producer ring buffer of readings in a multiprocessing.shared_memory block.
+    The producer writes a record into slot seq % capacity and then advances the
+    write counter in the header; no lock is shared between processes. Readers keep
+    their own position and detect records overwritten under them by re-checking
+    the record's sequence number after unpacking it.
+    """
+    def __init__(self, name: str = None, capacity: int = DEFAULT_RING_CAPACITY):
+        if name is None:
+            self._shm = shared_memory.SharedMemory(create=True, size=RING_HEADER_SIZE + capacity * READING.size)
+            self._shm.buf[:RING_HEADER_SIZE] = bytes(RING_HEADER_SIZE)
+            RING_HEADER.pack_into(self._shm.buf, 0, 0, capacity)
+            self.owner = True
+        else:
+            self._shm = shared_memory.SharedMemory(name=name)
+            self.owner = False
+        self.name = self._shm.name
+        self.buf = self._shm.buf
+        self._published, self.capacity = RING_HEADER.unpack_from(self.buf, 0)
+
+    def write_seq(self) -> int:
+        return WRITE_SEQ.unpack_from(self.buf, 0)[0]
+
+    def publish(self, received_at: float, reading: Reading, fit_indices, parsed_at: float = None) -> None:
+        """Appends one reading. Only one process may publish to a ring."""
+        seq = self._published
+        indices = (list(fit_indices) + [0, 0, 0])[:3]
+        offset = RING_HEADER_SIZE + (seq % self.capacity) * READING.size
+        device_time = float("nan") if reading.device_time is None else reading.device_time
+        READING.pack_into(self.buf, offset, seq + 1, received_at,
+                          received_at if parsed_at is None else parsed_at, reading.value, device_time,
+                          UNIT_CODE_BY_NAME.get(reading.unit, 0), reading.flags & 0xFF,
+                          min(len(fit_indices), 3), *indices)
+        self._published = seq + 1
+        WRITE_SEQ.pack_into(self.buf, 0, self._published)
+
+    def read(self, next_seq: int):
+        """
+        Returns (readings, next_seq, lost) for everything published since 'next_seq'.
+        Each reading is (received_at, parsed_at, Reading, fit_indices). 'lost' counts readings that
+        were overwritten before they could be read. Units outside UNIT_CODES come back as "".
+        """
+        end = self.write_seq()
+        lost = 0
+        if end - next_seq > self.capacity:
+            lost = end - self.capacity - next_seq
+            next_seq = end - self.capacity
+        readings = []
+        buf = self.buf
+        for k in range(next_seq, end):
+            offset = RING_HEADER_SIZE + (k % self.capacity) * READING.size
+            (seq, received_at, parsed_at, value, device_time, unit_code, flags,
+             count, i1, i2, i3) = READING.unpack_from(buf, offset)
+            if seq != k + 1 or WRITE_SEQ.unpack_from(buf, offset)[0] != k + 1:
+                lost += 1
+                continue
+            reading = Reading(value, UNIT_CODES.get(unit_code, ""), flags,
+                              None if device_time != device_time else device_time)
+            readings.append((received_at, parsed_at, reading, (i1, i2, i3)[:count]))
+        return readings, end, lost
+
+    def close(self) -> None:
+        self.buf = None
+        self._shm.close()
+        if self.owner:
+            self._shm.unlink()
+
+
+def is_test_reading(reading: Reading, selected_row: dict) -> bool:
+    """
+    Track-mode values are live readouts, not test results, and a reading in a unit
+    other than the selected row's cannot be compared with its allowances.
+    """
+    if reading.flags & FLAG_TRACK:
+        return False
+    return not reading.unit or reading.unit == normalize_unit(selected_row.get("unit", ""))
+
+def acquisition_main(ring_name: str, port: str, baudrate: int, selected_row: dict, stop_event,
+                     decoder_name: str = DEFAULT_DECODER) -> None:
+    """Entry point of the acquisition process: reads the port, matches, publishes to the ring."""
+    ring = ReadingRing(name=ring_name)
+
+    def publish(reading, received_at):
+        parsed_at = time.perf_counter()
+        fits = find_fits_in_selected_row(reading.value, selected_row) if is_test_reading(reading, selected_row) else []
+        ring.publish(received_at, reading, [fit["allowance_index"] for fit in fits], parsed_at)
+
+    try:
+        read_from_serial(port, baudrate, publish, stop_event, decoder=create_decoder(decoder_name))
+    finally:
+        ring.close()
+
+
+class AcquisitionProcess:
+    """
+    Runs serial reading and allowance matching in a separate process so that
+    nothing the UI does can delay acquisition. A consumer thread in this process
+    polls the ring and hands each reading to callback(reading, fit_indices, received_at).
+    If 'metrics' is given, the child's receipt-to-decode time is recorded as "parsed"
+    (perf_counter is system-wide, so both timestamps come from the same clock).
+    """
+    def __init__(self, port: str, baudrate: int, selected_row: dict, callback, decoder_name: str = DEFAULT_DECODER,
+                 poll_interval: float = 0.005, capacity: int = DEFAULT_RING_CAPACITY, on_lost=None, metrics=None):
+        self.ring = ReadingRing(capacity=capacity)
+        self.callback = callback
+        self.metrics = metrics
+        self.on_lost = on_lost
+        self.poll_interval = poll_interval
+        self.stop_event = multiprocessing.Event()
+        self._consumer_stop = threading.Event()
+        self.process = multiprocessing.Process(
+            target=acquisition_main,
+            args=(self.ring.name, port, baudrate, selected_row, self.stop_event, decoder_name),
+            daemon=True
+        )
+        self.consumer = threading.Thread(target=self._consume, daemon=True)
+        self._next_seq = 0
+
+    def start(self) -> None:
+        self.process.start()
+        self.consumer.start()
+
+    def _drain(self) -> None:
+        readings, self._next_seq, lost = self.ring.read(self._next_seq)
+        if lost and self.on_lost:
+            self.on_lost(lost)
+        for received_at, parsed_at, reading, fit_indices in readings:
+            if self.metrics is not None:
+                self.metrics.observe_elapsed("parsed", parsed_at - received_at)
+            self.callback(reading, fit_indices, received_at)
+
+    def _consume(self) -> None:
+        while not self._consumer_stop.wait(self.poll_interval):
+            try:
+                self._drain()
+            except Exception as e:
+                print("Acquisition consumer error:", e)
+
+    def stop(self, timeout: float = 2) -> None:
+        """Stops the acquisition process, delivers any readings still in the ring and frees it."""
+        self.stop_event.set()
+        self.process.join(timeout)
+        if self.process.is_alive():
+            self.process.terminate()
+            self.process.join(timeout)
+        self._consumer_stop.set()
+        self.consumer.join(timeout)
+        self._drain()
+        self.ring.close()
@@ -1,12 +1,17 @@
 import sqlite3
 import datetime
+import hashlib
 import json
+import re
 
 DB_FILE = "data.db"
 
 def init_db(db_file: str = DB_FILE) -> None:
     """
-    Create the tables TorqueTable, RawData, and Summary if they do not already exist.
+    Create the tables TorqueTable, RawData, and Summary if they do not already exist,
+    plus the TableVersion counter that triggers bump on every TorqueTable write, the
+    columns, change log and triggers used by db_sync, and the customer, instrument and
+    test session tables. Older databases are migrated in place.
     """
     with sqlite3.connect(db_file) as conn:
         cursor = conn.cursor()
@@ -32,6 +37,10 @@ def init_db(db_file: str = DB_FILE) -> None:
                 allowance_range TEXT
             )
         """)
+        cursor.execute("PRAGMA table_info(RawData)")
+        if "journal_seq" not in [col[1] for col in cursor.fetchall()]:
+            cursor.execute("ALTER TABLE RawData ADD COLUMN journal_seq INTEGER")
+        cursor.execute("CREATE UNIQUE INDEX IF NOT EXISTS RawData_journal_seq ON RawData (journal_seq)")
         cursor.execute("""
             CREATE TABLE IF NOT EXISTS Summary (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -39,8 +48,221 @@ def init_db(db_file: str = DB_FILE) -> None:
                 test_results TEXT
             )
         """)
+        # Every database knows its own station id (local = 1); a central database also lists
+        # the stations synced into it. Copied rows remember which station row they came from.
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS Station (
+                station_id TEXT PRIMARY KEY,
+                name TEXT NOT NULL DEFAULT '',
+                local INTEGER NOT NULL DEFAULT 0
+            )
+        """)
+        cursor.execute("""
+            INSERT INTO Station (station_id, local)
+            SELECT lower(hex(randomblob(16))), 1 WHERE NOT EXISTS (SELECT 1 FROM Station WHERE local = 1)
+        """)
+        for table in ("RawData", "Summary"):
+            _add_missing_columns(cursor, table, {"station": "TEXT", "station_row_id": "INTEGER"})
+            cursor.execute(f"CREATE UNIQUE INDEX IF NOT EXISTS {table}_station_row ON {table} (station, station_row_id)")
+        _init_torque_table_sync(cursor)
+        _init_customer_tables(cursor)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS TableVersion (
+                name TEXT PRIMARY KEY,
+                version INTEGER NOT NULL DEFAULT 0
+            )
+        """)
+        cursor.execute("INSERT OR IGNORE INTO TableVersion (name, version) VALUES ('TorqueTable', 0)")
+        for event in ("INSERT", "UPDATE", "DELETE"):
+            cursor.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS TorqueTable_version_{event.lower()}
+                AFTER {event} ON TorqueTable
+                BEGIN
+                    UPDATE TableVersion SET version = version + 1 WHERE name = 'TorqueTable';
+                END
+            """)
+        conn.commit()
+
+def get_station_identity(db_file: str = DB_FILE) -> tuple:
+    """Returns (station_id, name) of the station that owns 'db_file'."""
+    with sqlite3.connect(db_file) as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT station_id, name FROM Station WHERE local = 1")
+        return cursor.fetchone()
+
+def set_station_name(name: str, db_file: str = DB_FILE) -> None:
+    with sqlite3.connect(db_file) as conn:
+        cursor = conn.cursor()
+        cursor.execute("UPDATE Station SET name = ? WHERE local = 1", (name,))
         conn.commit()
 
+def _add_missing_columns(cursor, table: str, columns: dict) -> None:
+    cursor.execute(f"PRAGMA table_info({table})")
+    existing = [col[1] for col in cursor.fetchall()]
+    for name, sql_type in columns.items():
+        if name not in existing:
+            cursor.execute(f"ALTER TABLE {table} ADD COLUMN {name} {sql_type}")
+
+def torque_entry_uuid(max_torque, type_str, unit, applied_torq, allowance1, allowance2, allowance3) -> str:
+    """
+    Content-derived identity for a TorqueTable row, so identical entries created
+    independently on different stations (such as the defaults) sync as one row.
+    """
+    content = json.dumps([float(max_torque or 0), type_str, unit, applied_torq, allowance1, allowance2, allowance3])
+    return hashlib.sha1(content.encode("utf-8")).hexdigest()
+
+def _init_torque_table_sync(cursor) -> None:
+    """
+    Gives every TorqueTable row a stable uuid and updated_at, and logs every change
+    to TorqueTableChanges so db_sync can ship edits since a watermark.
+    """
+    _add_missing_columns(cursor, "TorqueTable", {"uuid": "TEXT", "updated_at": "TEXT"})
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS TorqueTableChanges (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            row_id INTEGER,
+            uuid TEXT,
+            deleted INTEGER NOT NULL DEFAULT 0
+        )
+    """)
+    now_sql = "strftime('%Y-%m-%d %H:%M:%f', 'now')"
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS TorqueTable_identity
+        AFTER INSERT ON TorqueTable
+        WHEN NEW.uuid IS NULL OR NEW.updated_at IS NULL
+        BEGIN
+            UPDATE TorqueTable
+            SET uuid = COALESCE(NEW.uuid, lower(hex(randomblob(16)))),
+                updated_at = COALESCE(NEW.updated_at, {now_sql})
+            WHERE id = NEW.id;
+        END
+    """)
+    # Local edits get a fresh updated_at; db_sync sets updated_at itself and is left alone.
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS TorqueTable_touch
+        AFTER UPDATE OF max_torque, type, unit, applied_torq, allowance1, allowance2, allowance3 ON TorqueTable
+        WHEN NEW.updated_at IS OLD.updated_at
+        BEGIN
+            UPDATE TorqueTable SET updated_at = {now_sql} WHERE id = NEW.id;
+        END
+    """)
+    for event, row in (("INSERT", "NEW"), ("UPDATE", "NEW"), ("DELETE", "OLD")):
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS TorqueTable_log_{event.lower()}
+            AFTER {event} ON TorqueTable
+            BEGIN
+                INSERT INTO TorqueTableChanges (row_id, uuid, deleted)
+                VALUES ({row}.id, {row}.uuid, {1 if event == "DELETE" else 0});
+            END
+        """)
+    cursor.execute("""
+        SELECT id, max_torque, type, unit, applied_torq, allowance1, allowance2, allowance3
+        FROM TorqueTable WHERE uuid IS NULL
+    """)
+    seen = set()
+    for r in cursor.fetchall():
+        uuid = torque_entry_uuid(*r[1:])
+        if uuid in seen:
+            uuid = None  # an exact duplicate row keeps its own random identity
+        seen.add(uuid)
+        cursor.execute(f"""
+            UPDATE TorqueTable SET uuid = COALESCE(?, lower(hex(randomblob(16)))), updated_at = {now_sql}
+            WHERE id = ?
+        """, (uuid, r[0]))
+    cursor.execute("CREATE UNIQUE INDEX IF NOT EXISTS TorqueTable_uuid ON TorqueTable (uuid)")
+
+def _init_customer_tables(cursor) -> None:
+    """
+    Customers own instruments (brand, model, serial) and each test session points at
+    the instrument tested. CustomerSearch is an FTS5 index with one row per instrument,
+    kept current by triggers; it is skipped if this SQLite build lacks FTS5.
+    """
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS Customer (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            email TEXT NOT NULL DEFAULT '',
+            contact TEXT NOT NULL DEFAULT '',
+            created_at TEXT
+        )
+    """)
+    cursor.execute("CREATE UNIQUE INDEX IF NOT EXISTS Customer_name ON Customer (name COLLATE NOCASE)")
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS Instrument (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            customer_id INTEGER NOT NULL REFERENCES Customer (id),
+            brand TEXT NOT NULL DEFAULT '',
+            model TEXT NOT NULL DEFAULT '',
+            serial TEXT NOT NULL DEFAULT '',
+            unit TEXT NOT NULL DEFAULT '',
+            created_at TEXT
+        )
+    """)
+    cursor.execute("""
+        CREATE UNIQUE INDEX IF NOT EXISTS Instrument_identity
+        ON Instrument (customer_id, brand COLLATE NOCASE, model COLLATE NOCASE, serial COLLATE NOCASE)
+    """)
+    # A session covers the journal sequence numbers written while it ran; readings are
+    # tagged with their session when they are drained into RawData.
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS TestSession (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            instrument_id INTEGER REFERENCES Instrument (id),
+            torque_table_id INTEGER,
+            started_at TEXT,
+            ended_at TEXT,
+            first_journal_seq INTEGER,
+            last_journal_seq INTEGER
+        )
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS TestSession_instrument ON TestSession (instrument_id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS TestSession_first_seq ON TestSession (first_journal_seq)")
+    _add_missing_columns(cursor, "TestSession", {"station": "TEXT", "station_row_id": "INTEGER"})
+    cursor.execute("CREATE UNIQUE INDEX IF NOT EXISTS TestSession_station_row ON TestSession (station, station_row_id)")
+    for table in ("RawData", "Summary"):
+        _add_missing_columns(cursor, table, {"session_id": "INTEGER"})
+        cursor.execute(f"CREATE INDEX IF NOT EXISTS {table}_session ON {table} (session_id)")
+    try:
+        cursor.execute("""
+            CREATE VIRTUAL TABLE IF NOT EXISTS CustomerSearch USING fts5 (
+                name, email, contact, brand, model, serial,
+                tokenize = 'unicode61 remove_diacritics 2', prefix = '1 2 3'
+            )
+        """)
+    except sqlite3.OperationalError:
+        return
+    index_instrument = """
+        INSERT INTO CustomerSearch (rowid, name, email, contact, brand, model, serial)
+        SELECT i.id, c.name, c.email, c.contact, i.brand, i.model, i.serial
+        FROM Instrument i JOIN Customer c ON c.id = i.customer_id
+    """
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS Instrument_search_insert AFTER INSERT ON Instrument
+        BEGIN
+            {index_instrument} WHERE i.id = NEW.id;
+        END
+    """)
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS Instrument_search_update AFTER UPDATE ON Instrument
+        BEGIN
+            DELETE FROM CustomerSearch WHERE rowid = OLD.id;
+            {index_instrument} WHERE i.id = NEW.id;
+        END
+    """)
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS Instrument_search_delete AFTER DELETE ON Instrument
+        BEGIN
+            DELETE FROM CustomerSearch WHERE rowid = OLD.id;
+        END
+    """)
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS Customer_search_update AFTER UPDATE ON Customer
+        BEGIN
+            DELETE FROM CustomerSearch WHERE rowid IN (SELECT id FROM Instrument WHERE customer_id = NEW.id);
+            {index_instrument} WHERE i.customer_id = NEW.id;
+        END
+    """)
+
 def insert_default_torque_table_data(db_file: str = DB_FILE) -> None:
     """
     Inserts default torque table entries if the TorqueTable is empty.
@@ -106,12 +328,12 @@ def insert_default_torque_table_data(db_file: str = DB_FILE) -> None:
         cursor.execute("SELECT COUNT(*) FROM TorqueTable")
         count = cursor.fetchone()[0]
         if count == 0:
-            for row in default_data:
-                cursor.execute("""
-                    INSERT INTO TorqueTable (max_torque, type, unit, applied_torq, allowance1, allowance2, allowance3)
-                    VALUES (?, ?, ?, ?, ?, ?, ?)
-                """, (row["max_torque"], row["type"], row["unit"], json.dumps(row["applied_torq"]),
-                      row["allowance1"], row["allowance2"], row["allowance3"]))
+            rows = [(row["max_torque"], row["type"], row["unit"], json.dumps(row["applied_torq"]),
+                     row["allowance1"], row["allowance2"], row["allowance3"]) for row in default_data]
+            cursor.executemany("""
+                INSERT INTO TorqueTable (max_torque, type, unit, applied_torq, allowance1, allowance2, allowance3, uuid)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """, [r + (torque_entry_uuid(*r),) for r in rows])
             conn.commit()
 
 def get_torque_table(db_file: str = DB_FILE) -> list:
@@ -125,19 +347,106 @@ def get_torque_table(db_file: str = DB_FILE) -> list:
             FROM TorqueTable
         """)
         rows = cursor.fetchall()
-    torque_table = []
-    for r in rows:
-        torque_table.append({
-            "id": r[0],
-            "max_torque": r[1],
-            "type": r[2],
-            "unit": r[3],
-            "applied_torq": r[4],
-            "allowance1": r[5],
-            "allowance2": r[6],
-            "allowance3": r[7]
-        })
-    return torque_table
+    return [_torque_row_to_dict(r) for r in rows]
+
+def _torque_row_to_dict(r) -> dict:
+    return {
+        "id": r[0],
+        "max_torque": r[1],
+        "type": r[2],
+        "unit": r[3],
+        "applied_torq": r[4],
+        "allowance1": r[5],
+        "allowance2": r[6],
+        "allowance3": r[7]
+    }
+
+class TorqueTableCache:
+    """
+    Keeps one snapshot of the TorqueTable indexed by id, type and unit.
+    The snapshot is reloaded only when the table has changed: 'PRAGMA data_version'
+    on a long-lived connection notices commits from any connection or process, and
+    the trigger-maintained TableVersion counter tells TorqueTable writes apart
+    from RawData/Summary writes.
+    """
+    def __init__(self, db_file: str = DB_FILE):
+        self.db_file = db_file
+        self._conn = None
+        self._data_version = None
+        self.version = None
+        self._rows = []
+        self._by_id = {}
+        self._by_type = {}
+        self._by_unit = {}
+
+    def _connection(self):
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.db_file)
+        return self._conn
+
+    def close(self) -> None:
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def invalidate(self) -> None:
+        """Forces the next access to reload the snapshot."""
+        self._data_version = None
+        self.version = None
+
+    def _ensure_fresh(self) -> None:
+        conn = self._connection()
+        data_version = conn.execute("PRAGMA data_version").fetchone()[0]
+        if data_version == self._data_version:
+            return
+        self._data_version = data_version
+        row = conn.execute("SELECT version FROM TableVersion WHERE name = 'TorqueTable'").fetchone()
+        table_version = row[0] if row else None
+        if table_version is not None and table_version == self.version:
+            return
+        rows = conn.execute("""
+            SELECT id, max_torque, type, unit, applied_torq, allowance1, allowance2, allowance3
+            FROM TorqueTable
+        """).fetchall()
+        self._rows = [_torque_row_to_dict(r) for r in rows]
+        self._by_id = {}
+        self._by_type = {}
+        self._by_unit = {}
+        for entry in self._rows:
+            self._by_id[entry["id"]] = entry
+            if entry["type"]:
+                self._by_type.setdefault(entry["type"], []).append(entry)
+            if entry["unit"]:
+                self._by_unit.setdefault(entry["unit"], []).append(entry)
+        # A missing counter (pre-trigger database) means every data change reloads.
+        self.version = table_version
+
+    def rows(self) -> list:
+        """Returns all TorqueTable entries as dictionaries, like get_torque_table()."""
+        self._ensure_fresh()
+        return self._rows
+
+    def get(self, entry_id: int):
+        self._ensure_fresh()
+        return self._by_id.get(entry_id)
+
+    def rows_by_type(self, type_str: str) -> list:
+        self._ensure_fresh()
+        return self._by_type.get(type_str, [])
+
+    def rows_by_unit(self, unit: str) -> list:
+        self._ensure_fresh()
+        return self._by_unit.get(unit, [])
+
+    def types(self) -> list:
+        """Returns the distinct types, like get_all_types()."""
+        self._ensure_fresh()
+        return list(self._by_type)
+
+    def units(self) -> list:
+        """Returns the distinct units, like get_all_units()."""
+        self._ensure_fresh()
+        return list(self._by_unit)
 
 def insert_torque_table_entry(max_torque: float, type_str: str, unit: str, applied_torq: str,
                               allowance1: str, allowance2: str, allowance3: str, db_file: str = DB_FILE) -> None:
@@ -172,6 +481,91 @@ def update_torque_table_entry(entry_id: int, max_torque: float, type_str: str, u
         """, (max_torque, type_str, unit, applied_torq, allowance1, allowance2, allowance3, entry_id))
         conn.commit()
 
+def import_torque_table_entries(entries: list, on_conflict: str = "skip", progress=None,
+                                chunk_size: int = 1000, db_file: str = DB_FILE) -> dict:
+    """
+    Writes many TorqueTable entries in a single transaction.
+    'entries' are dicts with the TorqueTable columns (applied_torq already JSON-encoded).
+    An entry conflicts with an existing row that has the same max_torque, type and unit
+    (case-insensitive); 'on_conflict' is "skip", "replace" (update the existing row)
+    or "insert" (add a duplicate). Later entries in the batch win over earlier ones,
+    which are counted as skipped. Type and unit are written in the spelling already
+    used in the table (or first seen in the batch), so casing variants do not add new
+    Type/Unit choices. progress(done, total) is called after each chunk. Returns counts
+    of inserted, updated and skipped entries.
+    """
+    if on_conflict not in ("skip", "replace", "insert"):
+        raise ValueError(f"Unknown conflict mode: {on_conflict}")
+
+    def key_of(max_torque, type_str, unit):
+        return (float(max_torque), (type_str or "").casefold(), (unit or "").casefold())
+
+    counts = {"inserted": 0, "updated": 0, "skipped": 0}
+    with sqlite3.connect(db_file) as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT id, max_torque, type, unit FROM TorqueTable")
+        existing_rows = cursor.fetchall()
+        existing = {key_of(r[1], r[2], r[3]): r[0] for r in existing_rows if r[1] is not None}
+        type_spelling = {}
+        unit_spelling = {}
+        for _, _, type_str, unit in existing_rows:
+            if type_str:
+                type_spelling.setdefault(type_str.casefold(), type_str)
+            if unit:
+                unit_spelling.setdefault(unit.casefold(), unit)
+
+        inserts = {}
+        duplicates = []
+        updates = {}
+        for entry in entries:
+            type_str = type_spelling.setdefault(entry["type"].casefold(), entry["type"])
+            unit = unit_spelling.setdefault(entry["unit"].casefold(), entry["unit"])
+            values = (entry["max_torque"], type_str, unit, entry["applied_torq"],
+                      entry["allowance1"], entry["allowance2"], entry["allowance3"])
+            key = key_of(entry["max_torque"], type_str, unit)
+            if on_conflict == "insert":
+                duplicates.append(values)
+            elif key in existing:
+                if on_conflict == "replace":
+                    if existing[key] in updates:
+                        counts["skipped"] += 1
+                    updates[existing[key]] = values
+                else:
+                    counts["skipped"] += 1
+            else:
+                if key in inserts:
+                    counts["skipped"] += 1
+                inserts[key] = values
+
+        total = len(inserts) + len(duplicates) + len(updates)
+        insert_rows = list(inserts.values()) + duplicates
+        update_rows = [values + (entry_id,) for entry_id, values in updates.items()]
+        done = 0
+        for start in range(0, len(insert_rows), chunk_size):
+            chunk = insert_rows[start:start + chunk_size]
+            cursor.executemany("""
+                INSERT INTO TorqueTable (max_torque, type, unit, applied_torq, allowance1, allowance2, allowance3)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            """, chunk)
+            done += len(chunk)
+            if progress:
+                progress(done, total)
+        for start in range(0, len(update_rows), chunk_size):
+            chunk = update_rows[start:start + chunk_size]
+            cursor.executemany("""
+                UPDATE TorqueTable
+                SET max_torque = ?, type = ?, unit = ?, applied_torq = ?,
+                    allowance1 = ?, allowance2 = ?, allowance3 = ?
+                WHERE id = ?
+            """, chunk)
+            done += len(chunk)
+            if progress:
+                progress(done, total)
+        conn.commit()
+    counts["inserted"] = len(insert_rows)
+    counts["updated"] = len(update_rows)
+    return counts
+
 def insert_raw_data(target: float, torque_table_id: int, which_allowance: str, allowance_range: str, db_file: str = DB_FILE) -> None:
     """
     Inserts a measurement result (raw data) into the RawData table.
@@ -185,7 +579,75 @@ def insert_raw_data(target: float, torque_table_id: int, which_allowance: str, a
         """, (timestamp, target, torque_table_id, which_allowance, allowance_range))
         conn.commit()
 
-def insert_summary(allowance_range: str, test_results: list, db_file: str = DB_FILE) -> None:
+def insert_raw_data_batch(records: list, db_file: str = DB_FILE) -> None:
+    """
+    Inserts journaled readings into RawData in one transaction. Each record is a dict with
+    seq, timestamp (epoch seconds), target, torque_table_id, which_allowance and allowance_range.
+    Records whose journal sequence number is already present are ignored. Each row is linked
+    to the test session whose journal range contains its sequence number.
+    """
+    rows = [(datetime.datetime.fromtimestamp(r["timestamp"]).strftime("%Y-%m-%d %H:%M:%S"),
+             r["target"], r["torque_table_id"], r["which_allowance"], r["allowance_range"], r["seq"])
+            for r in records]
+    with sqlite3.connect(db_file) as conn:
+        cursor = conn.cursor()
+        cursor.executemany("""
+            INSERT OR IGNORE INTO RawData (timestamp, target_torque, torque_table_id, which_allowance,
+                                           allowance_range, journal_seq, session_id)
+            VALUES (?1, ?2, ?3, ?4, ?5, ?6, (
+                SELECT id FROM TestSession
+                WHERE first_journal_seq <= ?6 AND (last_journal_seq IS NULL OR last_journal_seq >= ?6)
+                ORDER BY first_journal_seq DESC
+                LIMIT 1
+            ))
+        """, rows)
+        conn.commit()
+
+def get_max_journal_seq(db_file: str = DB_FILE) -> int:
+    """Returns the highest journal sequence number stored in RawData, or 0."""
+    with sqlite3.connect(db_file) as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT MAX(journal_seq) FROM RawData")
+        return cursor.fetchone()[0] or 0
+
+def get_raw_data_page(before_id: int = None, limit: int = 100, torque_table_id: int = None,
+                      session_id: int = None, db_file: str = DB_FILE) -> list:
+    """
+    Returns up to 'limit' RawData rows, newest first, with id below 'before_id' if given.
+    Pass the smallest id of one page as 'before_id' to get the next page.
+    """
+    conditions = []
+    params = []
+    if before_id is not None:
+        conditions.append("id < ?")
+        params.append(before_id)
+    if torque_table_id is not None:
+        conditions.append("torque_table_id = ?")
+        params.append(torque_table_id)
+    if session_id is not None:
+        conditions.append("session_id = ?")
+        params.append(session_id)
+    where = ("WHERE " + " AND ".join(conditions)) if conditions else ""
+    with sqlite3.connect(db_file) as conn:
+        cursor = conn.cursor()
+        cursor.execute(f"""
+            SELECT id, timestamp, target_torque, torque_table_id, which_allowance, allowance_range
+            FROM RawData
+            {where}
+            ORDER BY id DESC
+            LIMIT ?
+        """, params + [limit])
+        rows = cursor.fetchall()
+    return [{
+        "id": r[0],
+        "timestamp": r[1],
+        "target_torque": r[2],
+        "torque_table_id": r[3],
+        "which_allowance": r[4],
+        "allowance_range": r[5]
+    } for r in rows]
+
+def insert_summary(allowance_range: str, test_results: list, session_id: int = None, db_file: str = DB_FILE) -> None:
     """
     Inserts a summary record. 'test_results' is a list of floats converted to a comma-separated string.
     """
@@ -193,9 +655,9 @@ def insert_summary(allowance_range: str, test_results: list, db_file: str = DB_F
     with sqlite3.connect(db_file) as conn:
         cursor = conn.cursor()
         cursor.execute("""
-            INSERT INTO Summary (allowance_range, test_results)
-            VALUES (?, ?)
-        """, (allowance_range, results_str))
+            INSERT INTO Summary (allowance_range, test_results, session_id)
+            VALUES (?, ?, ?)
+        """, (allowance_range, results_str, session_id))
         conn.commit()
 
 def get_all_types(db_file: str = DB_FILE) -> list:
@@ -217,3 +679,211 @@ def get_all_units(db_file: str = DB_FILE) -> list:
         cursor.execute("SELECT DISTINCT unit FROM TorqueTable WHERE unit IS NOT NULL")
         results = [row[0] for row in cursor.fetchall() if row[0]]
     return results
+
+def _customer_row_to_dict(r) -> dict:
+    return {
+        "instrument_id": r[0],
+        "customer_id": r[1],
+        "customer": r[2],
+        "email": r[3],
+        "contact": r[4],
+        "brand": r[5],
+        "model": r[6],
+        "serial": r[7],
+        "unit": r[8]
+    }
+
+CUSTOMER_SELECT = """
+    SELECT i.id, c.id, c.name, c.email, c.contact, i.brand, i.model, i.serial, i.unit
+    FROM Instrument i JOIN Customer c ON c.id = i.customer_id
+"""
+
+def save_customer_info(customer_info: dict, db_file: str = DB_FILE) -> int:
+    """
+    Stores a customer_info dict (customer, email, contact, brand, model, unit, serial) as a
+    Customer and one of its Instruments, reusing existing rows with the same customer name and
+    the same brand, model and serial. Non-empty fields overwrite stored ones. Returns the instrument id.
+    Raises ValueError without a customer name, since customers are identified by it.
+    """
+    now = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    info = {key: (customer_info.get(key) or "").strip()
+            for key in ("customer", "email", "contact", "brand", "model", "unit", "serial")}
+    if not info["customer"]:
+        raise ValueError("A customer name is required.")
+    with sqlite3.connect(db_file) as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            INSERT OR IGNORE INTO Customer (name, email, contact, created_at) VALUES (?, ?, ?, ?)
+        """, (info["customer"], info["email"], info["contact"], now))
+        cursor.execute("SELECT id FROM Customer WHERE name = ? COLLATE NOCASE", (info["customer"],))
+        customer_id = cursor.fetchone()[0]
+        # Only touch the row when something changed, so the search index is not rewritten for nothing.
+        cursor.execute("""
+            UPDATE Customer SET email = CASE WHEN ?1 <> '' THEN ?1 ELSE email END,
+                                contact = CASE WHEN ?2 <> '' THEN ?2 ELSE contact END
+            WHERE id = ?3 AND ((?1 <> '' AND email <> ?1) OR (?2 <> '' AND contact <> ?2))
+        """, (info["email"], info["contact"], customer_id))
+        cursor.execute("""
+            INSERT OR IGNORE INTO Instrument (customer_id, brand, model, serial, unit, created_at)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, (customer_id, info["brand"], info["model"], info["serial"], info["unit"], now))
+        cursor.execute("""
+            SELECT id FROM Instrument
+            WHERE customer_id = ? AND brand = ? COLLATE NOCASE AND model = ? COLLATE NOCASE AND serial = ? COLLATE NOCASE
+        """, (customer_id, info["brand"], info["model"], info["serial"]))
+        instrument_id = cursor.fetchone()[0]
+        if info["unit"]:
+            cursor.execute("UPDATE Instrument SET unit = ? WHERE id = ? AND unit <> ?",
+                           (info["unit"], instrument_id, info["unit"]))
+        conn.commit()
+    return instrument_id
+
+def get_customer_info(instrument_id: int, db_file: str = DB_FILE):
+    """Returns the customer_info dict of an instrument (with its ids), or None."""
+    with sqlite3.connect(db_file) as conn:
+        cursor = conn.cursor()
+        cursor.execute(CUSTOMER_SELECT + " WHERE i.id = ?", (instrument_id,))
+        r = cursor.fetchone()
+    return _customer_row_to_dict(r) if r else None
+
+def search_customers(text: str, limit: int = 20, db_file: str = DB_FILE) -> list:
+    """
+    Search-as-you-type lookup of customer instruments. Every word of 'text' must prefix-match
+    one of name, email, contact, brand, model or serial; best matches come first.
+    """
+    terms = re.findall(r"\w+", text.lower())
+    if not terms:
+        return []
+    with sqlite3.connect(db_file) as conn:
+        cursor = conn.cursor()
+        try:
+            cursor.execute(f"""
+                SELECT i.id, c.id, c.name, c.email, c.contact, i.brand, i.model, i.serial, i.unit
+                FROM CustomerSearch s
+                JOIN Instrument i ON i.id = s.rowid
+                JOIN Customer c ON c.id = i.customer_id
+                WHERE CustomerSearch MATCH ?
+                ORDER BY s.rank
+                LIMIT ?
+            """, (" ".join(f'"{term}"*' for term in terms), limit))
+        except sqlite3.OperationalError:
+            # SQLite without FTS5: fall back to a table scan.
+            fields = "(c.name || ' ' || c.email || ' ' || c.contact || ' ' || i.brand || ' ' || i.model || ' ' || i.serial)"
+            cursor.execute(CUSTOMER_SELECT + " WHERE " + " AND ".join(f"{fields} LIKE ?" for _ in terms)
+                           + " ORDER BY c.name LIMIT ?", [f"%{term}%" for term in terms] + [limit])
+        rows = cursor.fetchall()
+    return [_customer_row_to_dict(r) for r in rows]
+
+def start_test_session(instrument_id: int, torque_table_id: int, first_journal_seq: int,
+                       db_file: str = DB_FILE) -> int:
+    """Records the start of a test on an instrument and returns the session id."""
+    started_at = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    with sqlite3.connect(db_file) as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            INSERT INTO TestSession (instrument_id, torque_table_id, started_at, first_journal_seq)
+            VALUES (?, ?, ?, ?)
+        """, (instrument_id, torque_table_id, started_at, first_journal_seq))
+        conn.commit()
+        return cursor.lastrowid
+
+def end_test_session(session_id: int, last_journal_seq: int, db_file: str = DB_FILE) -> None:
+    ended_at = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    with sqlite3.connect(db_file) as conn:
+        cursor = conn.cursor()
+        cursor.execute("UPDATE TestSession SET ended_at = ?, last_journal_seq = ? WHERE id = ?",
+                       (ended_at, last_journal_seq, session_id))
+        conn.commit()
+
+def get_test_sessions(instrument_id: int = None, customer_id: int = None, db_file: str = DB_FILE) -> list:
+    """
+    Returns the test sessions of an instrument or of all a customer's instruments, newest first,
+    each with the number of readings recorded in it.
+    """
+    conditions = []
+    params = []
+    if instrument_id is not None:
+        conditions.append("t.instrument_id = ?")
+        params.append(instrument_id)
+    if customer_id is not None:
+        conditions.append("i.customer_id = ?")
+        params.append(customer_id)
+    where = ("WHERE " + " AND ".join(conditions)) if conditions else ""
+    with sqlite3.connect(db_file) as conn:
+        cursor = conn.cursor()
+        cursor.execute(f"""
+            SELECT t.id, t.instrument_id, t.torque_table_id, t.started_at, t.ended_at,
+                   (SELECT COUNT(*) FROM RawData r WHERE r.session_id = t.id)
+            FROM TestSession t
+            JOIN Instrument i ON i.id = t.instrument_id
+            {where}
+            ORDER BY t.id DESC
+        """, params)
+        rows = cursor.fetchall()
+    return [{
+        "id": r[0],
+        "instrument_id": r[1],
+        "torque_table_id": r[2],
+        "started_at": r[3],
+        "ended_at": r[4],
+        "readings": r[5]
+    } for r in rows]
+
+def get_test_session_page(before_id: int = None, limit: int = 50, instrument_id: int = None,
+                          customer_id: int = None, db_file: str = DB_FILE) -> list:
+    """
+    Returns up to 'limit' test sessions, newest first, with id below 'before_id' if given.
+    Each carries its customer and instrument, reading count and the latest summary
+    (test results as floats) per allowance range.
+    """
+    conditions = []
+    params = []
+    if before_id is not None:
+        conditions.append("t.id < ?")
+        params.append(before_id)
+    if instrument_id is not None:
+        conditions.append("t.instrument_id = ?")
+        params.append(instrument_id)
+    if customer_id is not None:
+        conditions.append("i.customer_id = ?")
+        params.append(customer_id)
+    where = ("WHERE " + " AND ".join(conditions)) if conditions else ""
+    with sqlite3.connect(db_file) as conn:
+        cursor = conn.cursor()
+        cursor.execute(f"""
+            SELECT t.id, t.started_at, t.ended_at, t.torque_table_id, COALESCE(stn.name, t.station),
+                   t.instrument_id, c.id, c.name, i.brand, i.model, i.serial,
+                   (SELECT COUNT(*) FROM RawData r WHERE r.session_id = t.id)
+            FROM TestSession t
+            LEFT JOIN Instrument i ON i.id = t.instrument_id
+            LEFT JOIN Customer c ON c.id = i.customer_id
+            LEFT JOIN Station stn ON stn.station_id = t.station
+            {where}
+            ORDER BY t.id DESC
+            LIMIT ?
+        """, params + [limit])
+        rows = cursor.fetchall()
+        summaries = {r[0]: {} for r in rows}
+        if rows:
+            cursor.execute(f"""
+                SELECT session_id, allowance_range, test_results FROM Summary
+                WHERE session_id IN ({",".join("?" * len(rows))})
+                ORDER BY id
+            """, list(summaries))
+            for session_id, allowance_range, test_results in cursor.fetchall():
+                summaries[session_id][allowance_range] = [float(v) for v in test_results.split(",") if v]
+    return [{
+        "id": r[0],
+        "started_at": r[1],
+        "ended_at": r[2],
+        "torque_table_id": r[3],
+        "station": r[4],
+        "instrument_id": r[5],
+        "customer_id": r[6],
+        "customer": r[7],
+        "brand": r[8],
+        "model": r[9],
+        "serial": r[10],
+        "readings": r[11],
+        "results": summaries[r[0]]
+    } for r in rows]
@@ -0,0 +1,270 @@
+import argparse
+import json
+import os
+import sqlite3
+
+from db_handler import init_db, get_station_identity, set_station_name
+
+DEFAULT_BATCH_SIZE = 5000
+
+TORQUE_COLUMNS = ("max_torque", "type", "unit", "applied_torq", "allowance1", "allowance2", "allowance3")
+
+
+def _ensure_sync_state(conn) -> None:
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS main.SyncState (
+            station TEXT,
+            name TEXT,
+            value INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (station, name)
+        )
+    """)
+
+def _get_watermark(conn, station: str, name: str) -> int:
+    row = conn.execute("SELECT value FROM main.SyncState WHERE station = ? AND name = ?", (station, name)).fetchone()
+    return row[0] if row else 0
+
+def _set_watermark(conn, station: str, name: str, value: int) -> None:
+    conn.execute("""
+        INSERT INTO main.SyncState (station, name, value) VALUES (?, ?, ?)
+        ON CONFLICT (station, name) DO UPDATE SET value = excluded.value
+    """, (station, name, value))
+
+def _sync_torque_table(conn, station: str, src: str, dst: str, watermark_name: str) -> int:
+    """
+    Applies TorqueTable changes logged in 'src' since the watermark to 'dst'.
+    Rows are matched by uuid; on conflict the later updated_at wins, with the row
+    content as a deterministic tie-break so both sides converge. Returns rows changed in dst.
+    """
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        watermark = _get_watermark(conn, station, watermark_name)
+        changes = conn.execute(f"""
+            SELECT seq, row_id, uuid, deleted FROM {src}.TorqueTableChanges WHERE seq > ? ORDER BY seq
+        """, (watermark,)).fetchall()
+        if not changes:
+            conn.execute("COMMIT")
+            return 0
+        changed_ids = {row_id for _, row_id, _, deleted in changes if not deleted}
+        deleted_uuids = {uuid for _, _, uuid, deleted in changes if deleted and uuid}
+
+        columns = ", ".join(TORQUE_COLUMNS)
+        src_rows = []
+        ids = sorted(changed_ids)
+        for start in range(0, len(ids), 500):
+            chunk = ids[start:start + 500]
+            src_rows += conn.execute(f"""
+                SELECT uuid, updated_at, {columns} FROM {src}.TorqueTable
+                WHERE id IN ({",".join("?" * len(chunk))})
+            """, chunk).fetchall()
+
+        applied = 0
+        for row in src_rows:
+            uuid, updated_at, content = row[0], row[1], list(row[2:])
+            if uuid is None:
+                continue
+            deleted_uuids.discard(uuid)
+            existing = conn.execute(f"""
+                SELECT updated_at, {columns} FROM {dst}.TorqueTable WHERE uuid = ?
+            """, (uuid,)).fetchone()
+            if existing is None:
+                conn.execute(f"""
+                    INSERT INTO {dst}.TorqueTable ({columns}, uuid, updated_at)
+                    VALUES ({", ".join("?" * len(TORQUE_COLUMNS))}, ?, ?)
+                """, content + [uuid, updated_at])
+                applied += 1
+                continue
+            incoming = (updated_at or "", json.dumps(content))
+            current = (existing[0] or "", json.dumps(list(existing[1:])))
+            if incoming > current:
+                assignments = ", ".join(f"{col} = ?" for col in TORQUE_COLUMNS)
+                conn.execute(f"""
+                    UPDATE {dst}.TorqueTable SET {assignments}, updated_at = ? WHERE uuid = ?
+                """, content + [updated_at, uuid])
+                applied += 1
+        for uuid in deleted_uuids:
+            applied += conn.execute(f"DELETE FROM {dst}.TorqueTable WHERE uuid = ?", (uuid,)).rowcount
+        _set_watermark(conn, station, watermark_name, changes[-1][0])
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+    return applied
+
+def _push_customers(conn) -> int:
+    """
+    Copies station customers and instruments that the central database lacks, matching
+    customers by name and instruments by brand, model and serial (all case-insensitive).
+    Contact details empty on the central side are filled in. Returns rows added.
+    """
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        added = conn.execute("""
+            INSERT OR IGNORE INTO main.Customer (name, email, contact, created_at)
+            SELECT name, email, contact, created_at FROM st.Customer WHERE name <> ''
+        """).rowcount
+        conn.execute("""
+            UPDATE main.Customer AS c
+            SET email = CASE WHEN c.email = '' THEN s.email ELSE c.email END,
+                contact = CASE WHEN c.contact = '' THEN s.contact ELSE c.contact END
+            FROM st.Customer AS s
+            WHERE s.name = c.name COLLATE NOCASE AND s.name <> ''
+              AND ((c.email = '' AND s.email <> '') OR (c.contact = '' AND s.contact <> ''))
+        """)
+        added += conn.execute("""
+            INSERT OR IGNORE INTO main.Instrument (customer_id, brand, model, serial, unit, created_at)
+            SELECT cc.id, si.brand, si.model, si.serial, si.unit, si.created_at
+            FROM st.Instrument si
+            JOIN st.Customer sc ON sc.id = si.customer_id
+            JOIN main.Customer cc ON cc.name = sc.name COLLATE NOCASE
+            WHERE sc.name <> ''
+        """).rowcount
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+    return added
+
+def _push_sessions(conn, station: str) -> int:
+    """
+    Copies test sessions above the watermark, translating instrument and torque table ids.
+    Sessions still open at the station are sent again on later syncs until they end.
+    """
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        watermark = _get_watermark(conn, station, "TestSession")
+        copied = conn.execute("""
+            INSERT INTO main.TestSession (instrument_id, torque_table_id, started_at, ended_at,
+                                          station, station_row_id)
+            SELECT ci.id, ct.id, t.started_at, t.ended_at, ?1, t.id
+            FROM st.TestSession t
+            LEFT JOIN st.Instrument si ON si.id = t.instrument_id
+            LEFT JOIN st.Customer sc ON sc.id = si.customer_id
+            LEFT JOIN main.Customer cc ON cc.name = sc.name COLLATE NOCASE AND sc.name <> ''
+            LEFT JOIN main.Instrument ci ON ci.customer_id = cc.id AND ci.brand = si.brand COLLATE NOCASE
+                                         AND ci.model = si.model COLLATE NOCASE
+                                         AND ci.serial = si.serial COLLATE NOCASE
+            LEFT JOIN st.TorqueTable stt ON stt.id = t.torque_table_id
+            LEFT JOIN main.TorqueTable ct ON ct.uuid = stt.uuid
+            WHERE t.id > ?2
+            ON CONFLICT (station, station_row_id) DO UPDATE SET ended_at = excluded.ended_at
+        """, (station, watermark)).rowcount
+        first_open, last = conn.execute("""
+            SELECT MIN(CASE WHEN ended_at IS NULL THEN id END), MAX(id) FROM st.TestSession WHERE id > ?
+        """, (watermark,)).fetchone()
+        if last is not None:
+            _set_watermark(conn, station, "TestSession", first_open - 1 if first_open is not None else last)
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+    return copied
+
+def _push_rows(conn, station: str, table: str, insert_sql: str, batch_size: int, progress=None) -> int:
+    """
+    Copies rows of st.<table> with id above the watermark into the central table,
+    one id range per transaction. Each batch moves the watermark in the same
+    transaction, and the (station, station_row_id) unique index makes re-sending harmless.
+    """
+    total_max = conn.execute(f"SELECT MAX(id) FROM st.{table}").fetchone()[0] or 0
+    watermark = _get_watermark(conn, station, table)
+    inserted = 0
+    while watermark < total_max:
+        upper = min(watermark + batch_size, total_max)
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            inserted += conn.execute(insert_sql, (station, watermark, upper)).rowcount
+            _set_watermark(conn, station, table, upper)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        watermark = upper
+        if progress:
+            progress(table, watermark, total_max)
+    return inserted
+
+def station_identity(station_db: str, name: str = None) -> tuple:
+    """
+    Returns (station_id, name) for a station database. The id is generated once and stored
+    in the file, so it does not depend on the file's name or location. 'name' (if given)
+    replaces the stored display name; without one the file path is used.
+    """
+    init_db(station_db)
+    if name:
+        set_station_name(name, station_db)
+    station_id, stored_name = get_station_identity(station_db)
+    return station_id, stored_name or os.path.splitext(station_db)[0]
+
+def sync_station(station_db: str, central_db: str, station: str = None,
+                 batch_size: int = DEFAULT_BATCH_SIZE, progress=None) -> dict:
+    """
+    Synchronizes one station database with the central database:
+    TorqueTable edits go both ways, then customers, instruments, test sessions and the
+    RawData and Summary rows added since the last sync are copied up. Safe to interrupt
+    and re-run. Central rows and sync progress are keyed by the station id stored in the
+    station file; 'station' sets its display name. Returns per-step counts.
+    """
+    station, name = station_identity(station_db, station)
+    init_db(central_db)
+    conn = sqlite3.connect(central_db, isolation_level=None)
+    try:
+        conn.execute("ATTACH DATABASE ? AS st", (station_db,))
+        if conn.execute("SELECT 1 FROM main.Station WHERE local = 1 AND station_id = ?", (station,)).fetchone():
+            raise ValueError(f"{station_db} and {central_db} are the same database.")
+        _ensure_sync_state(conn)
+        conn.execute("""
+            INSERT INTO main.Station (station_id, name) VALUES (?, ?)
+            ON CONFLICT (station_id) DO UPDATE SET name = excluded.name
+        """, (station, name))
+        result = {
+            "torque_table_up": _sync_torque_table(conn, station, "st", "main", "TorqueTable_up"),
+            "torque_table_down": _sync_torque_table(conn, station, "main", "st", "TorqueTable_down"),
+        }
+        result["customers"] = _push_customers(conn)
+        result["sessions"] = _push_sessions(conn, station)
+        # Station torque_table_id values are translated to central ids through the row uuid,
+        # session ids through (station, station_row_id). journal_seq is local to a station.
+        result["raw_data"] = _push_rows(conn, station, "RawData", """
+            INSERT OR IGNORE INTO main.RawData (timestamp, target_torque, torque_table_id, which_allowance,
+                                                allowance_range, session_id, station, station_row_id)
+            SELECT r.timestamp, r.target_torque, ct.id, r.which_allowance, r.allowance_range, cs.id, ?1, r.id
+            FROM st.RawData r
+            LEFT JOIN st.TorqueTable stt ON stt.id = r.torque_table_id
+            LEFT JOIN main.TorqueTable ct ON ct.uuid = stt.uuid
+            LEFT JOIN main.TestSession cs ON cs.station = ?1 AND cs.station_row_id = r.session_id
+            WHERE r.id > ?2 AND r.id <= ?3
+        """, batch_size, progress)
+        result["summary"] = _push_rows(conn, station, "Summary", """
+            INSERT OR IGNORE INTO main.Summary (allowance_range, test_results, session_id, station, station_row_id)
+            SELECT s.allowance_range, s.test_results, cs.id, ?1, s.id
+            FROM st.Summary s
+            LEFT JOIN main.TestSession cs ON cs.station = ?1 AND cs.station_row_id = s.session_id
+            WHERE s.id > ?2 AND s.id <= ?3
+        """, batch_size, progress)
+    finally:
+        conn.close()
+    return result
+
+def main():
+    parser = argparse.ArgumentParser(description="Synchronize station databases with a central database.")
+    parser.add_argument("central", help="central SQLite file (created if missing)")
+    parser.add_argument("stations", nargs="+", help="station data.db files")
+    parser.add_argument("--station", help="station display name, stored in the station file "
+                                          "(only with a single station file; default: stored name or file path)")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    args = parser.parse_args()
+    if args.station and len(args.stations) > 1:
+        parser.error("--station can only be used with a single station file")
+    seen = {}
+    for station_db in args.stations:
+        station_id, _ = station_identity(station_db)
+        if station_id in seen:
+            parser.error(f"{station_db} is a copy of {seen[station_id]} (same station id)")
+        seen[station_id] = station_db
+    for station_db in args.stations:
+        result = sync_station(station_db, args.central, station=args.station, batch_size=args.batch_size)
+        print(f"{station_db}: " + ", ".join(f"{k}={v}" for k, v in result.items()))
+
+if __name__ == "__main__":
+    main()
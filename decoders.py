@@ -0,0 +1,191 @@
+import json
+import re
+import struct
+from collections import namedtuple
+
+PORT_DECODERS_FILE = "port_decoders.json"
+DEFAULT_DECODER = "ascii"
+
+# A decoded reading. 'unit' is one of the TorqueTable unit names where it could be
+# recognised (or the raw token, or "" if the device sent none); 'device_time' is in
+# seconds on the device's own clock, or None.
+Reading = namedtuple("Reading", "value unit flags device_time")
+
+FLAG_PEAK = 0x01
+FLAG_TRACK = 0x02
+FLAG_HIGH = 0x04
+FLAG_LOW = 0x08
+
+UNIT_ALIASES = {
+    "ft/lbs": "ft/lbs", "ft/lb": "ft/lbs", "ft.lb": "ft/lbs", "ft.lbs": "ft/lbs", "ft-lb": "ft/lbs",
+    "ftlb": "ft/lbs", "lbf.ft": "ft/lbs", "lb.ft": "ft/lbs",
+    "in/lbs": "in/lbs", "in/lb": "in/lbs", "in.lb": "in/lbs", "in.lbs": "in/lbs", "in-lb": "in/lbs",
+    "inlb": "in/lbs", "lbf.in": "in/lbs", "lb.in": "in/lbs",
+    "nm": "NM", "n.m": "NM", "n-m": "NM", "n·m": "NM",
+}
+
+# Unit codes used by binary frames and the acquisition ring buffer.
+UNIT_CODES = {0: "", 1: "ft/lbs", 2: "in/lbs", 3: "NM"}
+UNIT_CODE_BY_NAME = {name: code for code, name in UNIT_CODES.items()}
+
+def normalize_unit(token: str) -> str:
+    """Maps a device unit token to the TorqueTable spelling; unknown tokens are returned unchanged."""
+    if not token:
+        return ""
+    return UNIT_ALIASES.get(token.strip().lower(), token.strip())
+
+DECODERS = {}
+
+def register_decoder(cls):
+    """Class decorator that makes a decoder selectable by its 'name'."""
+    DECODERS[cls.name] = cls
+    return cls
+
+def create_decoder(name: str = DEFAULT_DECODER):
+    try:
+        return DECODERS[name]()
+    except KeyError:
+        raise ValueError(f"Unknown device protocol: {name}")
+
+
+@register_decoder
+class AsciiLineDecoder:
+    """
+    Newline-terminated ASCII readings such as "301.5", "HI 301.5 ft.lb" or "PK -12.0 Nm".
+    A line must consist of an optional known mode word, one number and an optional unit;
+    anything else (status messages, menus, garbage) is rejected rather than mined for digits.
+    """
+    name = "ascii"
+    label = "ASCII lines"
+    MAX_LINE = 256
+    LINE_RE = re.compile(
+        rb"^\s*(?:(?P<mode>[A-Za-z]{1,5})[\s:]+)?"
+        rb"(?P<value>[-+]?(?:\d+(?:\.\d*)?|\.\d+))"
+        rb"\s*(?P<unit>[A-Za-z][A-Za-z./\-]{0,7})?\s*$"
+    )
+    MODE_FLAGS = {
+        b"PK": FLAG_PEAK, b"PEAK": FLAG_PEAK,
+        b"TR": FLAG_TRACK, b"TRK": FLAG_TRACK, b"TRACK": FLAG_TRACK,
+        b"HI": FLAG_HIGH, b"LO": FLAG_LOW, b"OK": 0, b"NG": 0,
+    }
+
+    def __init__(self):
+        self._buffer = bytearray()
+        self._discarding = False
+
+    def feed(self, chunk: bytes) -> list:
+        """Consumes a chunk of raw bytes and returns the readings completed by it."""
+        self._buffer += chunk
+        readings = []
+        start = 0
+        buf = self._buffer
+        while True:
+            end = buf.find(b"\n", start)
+            if end < 0:
+                break
+            if self._discarding:
+                # The tail of an overlong line: not the start of a new one.
+                self._discarding = False
+            elif end - start <= self.MAX_LINE:
+                reading = self.decode_line(bytes(buf[start:end]))
+                if reading is not None:
+                    readings.append(reading)
+            start = end + 1
+        del buf[:start]
+        if len(buf) > self.MAX_LINE:
+            # No terminator in sight: drop the line, and everything up to its newline.
+            buf.clear()
+            self._discarding = True
+        return readings
+
+    def decode_line(self, line: bytes):
+        match = self.LINE_RE.match(line.rstrip(b"\r"))
+        if not match:
+            return None
+        flags = 0
+        mode = match.group("mode")
+        if mode is not None:
+            mode = mode.upper()
+            if mode not in self.MODE_FLAGS:
+                return None
+            flags = self.MODE_FLAGS[mode]
+        unit = match.group("unit")
+        return Reading(float(match.group("value")), normalize_unit(unit.decode("ascii")) if unit else "",
+                       flags, None)
+
+
+@register_decoder
+class FramedBinaryDecoder:
+    """
+    Length-prefixed binary frames with a checksum:
+
+        0xAA 0x55 | length (u8) | payload | checksum (u8)
+
+    where the checksum is the low byte of the sum of the length and payload bytes,
+    and a reading payload is little-endian <f value, u8 unit code, u8 flags, u32 device ms>.
+    Frames with another length are skipped. After a bad checksum the decoder resyncs
+    on the next 0xAA 0x55. Parsing works in place on the buffer through memoryview.
+    """
+    name = "framed"
+    label = "Binary frames (AA 55)"
+    SYNC = b"\xaa\x55"
+    PAYLOAD = struct.Struct("<fBBI")
+
+    def __init__(self):
+        self._buffer = bytearray()
+        self.checksum_errors = 0
+
+    def feed(self, chunk: bytes) -> list:
+        self._buffer += chunk
+        buf = self._buffer
+        readings = []
+        pos = 0
+        with memoryview(buf) as view:
+            while True:
+                pos = buf.find(self.SYNC, pos)
+                if pos < 0:
+                    # Keep a trailing 0xAA in case it starts the next sync word.
+                    pos = len(buf) - 1 if buf.endswith(b"\xaa") else len(buf)
+                    break
+                if pos + 3 > len(buf):
+                    break
+                length = buf[pos + 2]
+                frame_end = pos + 3 + length + 1
+                if frame_end > len(buf):
+                    break
+                if (length + sum(view[pos + 3:frame_end - 1])) & 0xFF != buf[frame_end - 1]:
+                    self.checksum_errors += 1
+                    pos += 1
+                    continue
+                if length == self.PAYLOAD.size:
+                    value, unit_code, flags, device_ms = self.PAYLOAD.unpack_from(buf, pos + 3)
+                    readings.append(Reading(value, UNIT_CODES.get(unit_code, ""), flags, device_ms / 1000.0))
+                pos = frame_end
+        del buf[:pos]
+        return readings
+
+    @classmethod
+    def encode(cls, value: float, unit: str = "", flags: int = 0, device_ms: int = 0) -> bytes:
+        """Builds one frame; used by device simulators."""
+        payload = cls.PAYLOAD.pack(value, UNIT_CODE_BY_NAME.get(unit, 0), flags, device_ms)
+        checksum = (len(payload) + sum(payload)) & 0xFF
+        return cls.SYNC + bytes([len(payload)]) + payload + bytes([checksum])
+
+
+def load_port_decoders(path: str = PORT_DECODERS_FILE) -> dict:
+    """Returns the saved {port: decoder name} choices."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+    return {port: name for port, name in data.items() if name in DECODERS}
+
+def save_port_decoder(port: str, name: str, path: str = PORT_DECODERS_FILE) -> None:
+    choices = load_port_decoders(path)
+    choices[port] = name
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(choices, f, indent=2)
+
+def decoder_name_for_port(port: str, path: str = PORT_DECODERS_FILE) -> str:
+    return load_port_decoders(path).get(port, DEFAULT_DECODER)
@@ -1,16 +1,15 @@
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
-import threading
 import queue
 import json
 import serial.tools.list_ports
-import tempfile
 import os
 import webbrowser
 import subprocess
 import sys
-
-import pdfkit
+import shutil
+import socket
+import sqlite3
 
 # For OCR extraction:
 try:
@@ -20,38 +19,35 @@ except ImportError:
     pass
 
 from db_handler import (
-    get_torque_table,
+    TorqueTableCache,
     insert_torque_table_entry,
     update_torque_table_entry,
-    insert_raw_data,
     insert_summary,
-    get_all_types,
-    get_all_units
+    save_customer_info,
+    search_customers,
+    start_test_session,
+    end_test_session,
+    get_test_sessions
 )
-from serial_reader import read_from_serial, find_fits_in_selected_row, parse_torque_value
+from serial_reader import parse_torque_value
+from acquisition import AcquisitionProcess
+from decoders import DECODERS, decoder_name_for_port, save_port_decoder
+from live_plot import LivePlot
+from torque_rules import auto_calculate_allowances, suggest_applied_torques
+from torque_import import import_torque_csv
+from metrics import PipelineMetrics, start_metrics_server
+from reading_journal import JournalDrainer, drain_journal, open_journal
+from stream_server import StreamServer
+from report_render import PREVIEW_DATA_FILE, render_report_html, write_preview_data
+from pdf_cache import render_pdf_cached
 
 BAUD_RATE = 9600
-
-def auto_calculate_allowances(applied_list, tolerance=0.04):
-    """Given a list of floats, returns a list of strings formatted as 'low - high'."""
-    allowances = []
-    for val in applied_list:
-        low = val * (1 - tolerance)
-        high = val * (1 + tolerance)
-        allowances.append(f"{low:.1f} - {high:.1f}")
-    return allowances
-
-def suggest_applied_torques(max_torque: float, type_str: str) -> tuple:
-    """Returns suggested applied torque values based on max torque and type."""
-    if type_str.lower() == "torque multiplier":
-        applied1 = max_torque * 0.3
-        applied2 = max_torque * 0.2
-        applied3 = max_torque * 0.1
-    else:
-        applied1 = max_torque * 0.95
-        applied2 = max_torque * 0.65
-        applied3 = max_torque * 0.40
-    return round(applied1, 1), round(applied2, 1), round(applied3, 1)
+# Set TORQUE_METRICS_PORT to serve Prometheus-style metrics at http://127.0.0.1:<port>/metrics
+METRICS_PORT = int(os.environ.get("TORQUE_METRICS_PORT", "0"))
+# Set TORQUE_API_PORT to stream live readings over HTTP/WebSocket; TORQUE_API_HOST=0.0.0.0 exposes it on the LAN
+API_PORT = int(os.environ.get("TORQUE_API_PORT", "0"))
+API_HOST = os.environ.get("TORQUE_API_HOST", "127.0.0.1")
+STATION_NAME = os.environ.get("TORQUE_STATION", socket.gethostname())
 
 class PlaceholderEntry(tk.Entry):
     """A custom Entry widget that displays placeholder text in grey."""
@@ -88,6 +84,21 @@ class TorqueAppGUI:
     def __init__(self, root):
         self.root = root
         self.root.title("Torque Testing App")
+        self.metrics = PipelineMetrics()
+        self.torque_cache = TorqueTableCache()
+        self._manage_tree_version = None
+        self.show_metrics_overlay = tk.BooleanVar(value=False)
+        self.metrics_server = None
+        metrics_error = None
+        if METRICS_PORT:
+            try:
+                self.metrics_server = start_metrics_server(self.metrics, METRICS_PORT)
+            except OSError as e:
+                metrics_error = f"Metrics server not started on port {METRICS_PORT}: {e}"
+        self.stream_server = None
+        if API_PORT:
+            self.stream_server = StreamServer(API_HOST, API_PORT, station=STATION_NAME)
+            self.stream_server.start()
         self.setup_styles()
         self.create_menu()
 
@@ -111,20 +122,64 @@ class TorqueAppGUI:
 
         # Status bar at bottom
         self.status_var = tk.StringVar()
-        self.status_var.set("Ready")
-        status_bar = ttk.Label(root, textvariable=self.status_var, relief="sunken", anchor="w")
-        status_bar.pack(fill="x", side="bottom")
-
-        # State and threading
+        self.status_var.set(metrics_error or "Ready")
+        status_frame = ttk.Frame(root)
+        status_frame.pack(fill="x", side="bottom")
+        status_bar = ttk.Label(status_frame, textvariable=self.status_var, relief="sunken", anchor="w")
+        status_bar.pack(fill="x", side="left", expand=True)
+        self.metrics_var = tk.StringVar()
+        self.metrics_label = ttk.Label(status_frame, textvariable=self.metrics_var, relief="sunken", anchor="e")
+        self._overlay_ticks = 0
+
+        # Test state; acquisition runs in its own process while a test is running
         self.running = False
-        self.thread = None
-        self.stop_event = threading.Event()
+        self.acquisition = None
         self.result_queue = queue.Queue()
+        self.sample_queue = queue.Queue()
         self.root.after(100, self.process_queue)
         self.selected_row = None
         self.allowance_counts = {"allowance1": 0, "allowance2": 0, "allowance3": 0}
         self.results_by_range = {}
         self.customer_info = {}
+        self.instrument_id = None
+        self.session_id = None
+
+        # Accepted readings go to the journal first; a background thread moves them into the DB.
+        self.journal, moved_journal = open_journal()
+        if moved_journal:
+            messagebox.showerror("Journal Error", "The reading journal could not be read and was moved to "
+                                 f"{moved_journal}.\nReadings in it that were not yet saved could not be recovered.")
+        # perf_counter receipt times of journaled readings, by journal seq, for the "committed" latency.
+        self.journal_received_at = {}
+        try:
+            recovered = drain_journal(self.journal)
+        except Exception as e:
+            recovered = []
+            messagebox.showerror("Journal Error", f"Could not replay unsaved readings:\n{e}")
+        if recovered:
+            self.status_var.set(f"Recovered {len(recovered)} unsaved reading(s) from the journal.")
+        self.journal_drainer = JournalDrainer(self.journal, on_drained=self.on_journal_drained)
+        self.journal_drainer.start()
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+
+    def on_close(self):
+        # A running test is stopped properly so the ring is emptied, shared memory freed and the
+        # session ended; then everything journaled is committed before the window goes away.
+        if self.running:
+            self.stop_test(notify=False)
+        self.journal_drainer.stop_event.set()
+        self.journal_drainer.join(2)
+        try:
+            drain_journal(self.journal)
+        except Exception as e:
+            print("Journal drain error:", e)
+        self.journal.close()
+        if self.stream_server is not None:
+            self.stream_server.stop()
+        if self.metrics_server is not None:
+            self.metrics_server.shutdown()
+        self.torque_cache.close()
+        self.root.destroy()
 
     def setup_styles(self):
         style = ttk.Style(self.root)
@@ -138,8 +193,13 @@ class TorqueAppGUI:
         # Create a simple menu bar for the main window.
         menu_bar = tk.Menu(self.root)
         file_menu = tk.Menu(menu_bar, tearoff=0)
-        file_menu.add_command(label="Exit", command=self.root.quit)
+        file_menu.add_command(label="Exit", command=self.on_close)
         menu_bar.add_cascade(label="File", menu=file_menu)
+        debug_menu = tk.Menu(menu_bar, tearoff=0)
+        debug_menu.add_checkbutton(label="Show Metrics Overlay", variable=self.show_metrics_overlay,
+                                   command=self.toggle_metrics_overlay)
+        debug_menu.add_command(label="Export Metrics...", command=self.export_metrics)
+        menu_bar.add_cascade(label="Debug", menu=debug_menu)
         help_menu = tk.Menu(menu_bar, tearoff=0)
         help_menu.add_command(label="About", command=lambda: messagebox.showinfo("About", "Torque Testing App\nVersion 1.0"))
         menu_bar.add_cascade(label="Help", menu=help_menu)
@@ -162,15 +222,39 @@ class TorqueAppGUI:
         self.port_combo = ttk.Combobox(selection_frame, textvariable=self.port_var, state="readonly")
         self.port_combo['values'] = self.get_serial_ports()
         self.port_combo.grid(row=1, column=1, padx=5, sticky="ew")
-
-        # Place the Upload Customer Info button here
+        self.port_combo.bind("<<ComboboxSelected>>", self.on_port_selected)
+
+        ttk.Label(selection_frame, text="Protocol:").grid(row=1, column=2, sticky="w")
+        self.protocol_names = list(DECODERS)
+        self.protocol_var = tk.StringVar()
+        self.protocol_combo = ttk.Combobox(selection_frame, textvariable=self.protocol_var, state="readonly", width=22)
+        self.protocol_combo['values'] = [DECODERS[name].label for name in self.protocol_names]
+        self.protocol_combo.current(0)
+        self.protocol_combo.grid(row=1, column=3, padx=5, sticky="w")
+        self.protocol_combo.bind("<<ComboboxSelected>>", self.on_protocol_selected)
+
+        # Repeat customers are found by typing; new ones are scanned with Upload Customer Info.
+        ttk.Label(selection_frame, text="Customer / Instrument:").grid(row=2, column=0, sticky="w")
+        self.customer_search_var = tk.StringVar()
+        self.customer_search_entry = ttk.Entry(selection_frame, textvariable=self.customer_search_var)
+        self.customer_search_entry.grid(row=2, column=1, padx=5, pady=5, sticky="ew")
+        self.customer_search_entry.bind("<KeyRelease>", self.on_customer_search)
+        self.customer_search_entry.bind("<Down>", self.focus_customer_results)
+        self.customer_search_entry.bind("<Escape>", lambda e: self.customer_results.grid_remove())
         upload_info_btn = ttk.Button(selection_frame, text="Upload Customer Info", command=self.upload_customer_info)
-        upload_info_btn.grid(row=2, column=1, sticky="w", padx=5, pady=5)
+        upload_info_btn.grid(row=2, column=2, columnspan=2, sticky="w", padx=5, pady=5)
+        self.customer_matches = []
+        self.customer_results = tk.Listbox(selection_frame, height=6, activestyle="dotbox")
+        self.customer_results.grid(row=3, column=1, padx=5, sticky="ew")
+        self.customer_results.grid_remove()
+        self.customer_results.bind("<Double-Button-1>", self.on_customer_chosen)
+        self.customer_results.bind("<Return>", self.on_customer_chosen)
+        self.customer_results.bind("<Escape>", lambda e: self.customer_results.grid_remove())
 
         self.start_button = ttk.Button(selection_frame, text="Start Test", command=self.start_test)
-        self.start_button.grid(row=3, column=0, pady=10, padx=5)
+        self.start_button.grid(row=4, column=0, pady=10, padx=5)
         self.stop_button = ttk.Button(selection_frame, text="Stop Test", command=self.stop_test, state="disabled")
-        self.stop_button.grid(row=3, column=1, pady=10, padx=5)
+        self.stop_button.grid(row=4, column=1, pady=10, padx=5)
 
         summary_frame = ttk.Frame(self.test_frame)
         summary_frame.grid(row=1, column=0, sticky="nsew", padx=5, pady=5)
@@ -182,6 +266,10 @@ class TorqueAppGUI:
         for col in columns:
             self.tree.heading(col, text=col)
         self.tree.pack(fill="both", expand=True)
+
+        self.live_plot = LivePlot(self.test_frame)
+        self.live_plot.grid(row=2, column=0, sticky="nsew", padx=5, pady=5)
+        self.test_frame.rowconfigure(2, weight=1)
         self.refresh_torque_dropdown()
         self.torque_combo.bind("<<ComboboxSelected>>", self.on_torque_combo_selected)
 
@@ -219,10 +307,62 @@ class TorqueAppGUI:
                 elif "serial" in key:
                     self.customer_info["serial"] = value
         if self.customer_info:
+            self.instrument_id = None
+            self.customer_search_var.set(self.customer_label(self.customer_info))
+            self.save_preview_data()
+            if not self.customer_info.get("customer"):
+                # Customers are looked up by name; a nameless scan would merge unrelated customers.
+                self.status_var.set("Customer info uploaded, but no customer name was found; it was not saved.")
+                return
+            try:
+                self.instrument_id = save_customer_info(self.customer_info)
+            except sqlite3.Error as e:
+                messagebox.showerror("Database Error", f"Could not save the customer:\n{e}")
             self.status_var.set("Customer info uploaded.")
         else:
             self.status_var.set("No recognizable customer info found.")
 
+    @staticmethod
+    def customer_label(info):
+        instrument = " ".join(v for v in (info.get("brand"), info.get("model")) if v)
+        if info.get("serial"):
+            instrument += f" (S/N {info['serial']})"
+        return f"{info.get('customer') or '?'} - {instrument}" if instrument else (info.get("customer") or "")
+
+    def on_customer_search(self, event):
+        if event.keysym in ("Down", "Up", "Escape", "Return", "Tab"):
+            return
+        self.customer_matches = search_customers(self.customer_search_var.get())
+        self.customer_results.delete(0, "end")
+        for match in self.customer_matches:
+            self.customer_results.insert("end", self.customer_label(match))
+        if self.customer_matches:
+            self.customer_results.grid()
+        else:
+            self.customer_results.grid_remove()
+
+    def focus_customer_results(self, event):
+        if self.customer_matches:
+            self.customer_results.focus_set()
+            self.customer_results.selection_clear(0, "end")
+            self.customer_results.selection_set(0)
+            self.customer_results.activate(0)
+
+    def on_customer_chosen(self, event):
+        selection = self.customer_results.curselection()
+        if not selection:
+            return
+        match = self.customer_matches[selection[0]]
+        self.instrument_id = match["instrument_id"]
+        self.customer_info = {key: match[key] for key in ("customer", "email", "contact", "brand", "model", "unit", "serial")
+                              if match[key]}
+        self.customer_search_var.set(self.customer_label(match))
+        self.customer_results.grid_remove()
+        self.customer_search_entry.focus_set()
+        self.save_preview_data()
+        previous = len(get_test_sessions(instrument_id=self.instrument_id))
+        self.status_var.set(f"Customer selected ({previous} previous test session(s) on this instrument).")
+
     def on_torque_combo_selected(self, event):
         idx = self.torque_combo.current()
         if idx < 0:
@@ -235,6 +375,7 @@ class TorqueAppGUI:
     def display_pre_test_rows(self):
         for item in self.tree.get_children():
             self.tree.delete(item)
+        self.live_plot.set_bands(self.selected_row)
         if not self.selected_row:
             return
         try:
@@ -248,7 +389,7 @@ class TorqueAppGUI:
             self.tree.insert("", "end", values=row_values)
 
     def refresh_torque_dropdown(self):
-        self.torque_table = get_torque_table()
+        self.torque_table = self.torque_cache.rows()
         self.torque_combo['values'] = [
             f"{row['max_torque']} {row['unit']} - {row['type']}" for row in self.torque_table
         ]
@@ -257,6 +398,19 @@ class TorqueAppGUI:
             self.selected_row = self.torque_table[0]
             self.display_pre_test_rows()
 
+    def on_port_selected(self, event):
+        name = decoder_name_for_port(self.port_var.get())
+        self.protocol_combo.current(self.protocol_names.index(name))
+
+    def on_protocol_selected(self, event):
+        # The protocol is remembered per port, since each bench port has its own tester.
+        if not self.port_var.get():
+            return
+        try:
+            save_port_decoder(self.port_var.get(), self.protocol_names[self.protocol_combo.current()])
+        except OSError as e:
+            print("Could not save protocol choice:", e)
+
     def get_serial_ports(self):
         ports = serial.tools.list_ports.comports()
         return [port.device for port in ports]
@@ -273,57 +427,137 @@ class TorqueAppGUI:
             self.selected_row = self.torque_table[idx]
         self.display_pre_test_rows()
         self.running = True
-        self.stop_event.clear()
         self.allowance_counts = {"allowance1": 0, "allowance2": 0, "allowance3": 0}
         self.results_by_range = {}
+        self.live_plot.clear()
+        self.session_id = start_test_session(self.instrument_id, self.selected_row["id"], self.journal.last_seq + 1)
         self.start_button.config(state="disabled")
         self.stop_button.config(state="normal")
-        self.thread = threading.Thread(target=self.run_serial, daemon=True)
-        self.thread.start()
+        self.acquisition = AcquisitionProcess(self.port_var.get(), BAUD_RATE, self.selected_row, self.on_reading,
+                                              decoder_name=self.protocol_names[self.protocol_combo.current()],
+                                              on_lost=self.on_readings_lost, metrics=self.metrics)
+        self.acquisition.start()
         self.status_var.set("Test started.")
 
-    def stop_test(self):
-        self.stop_event.set()
+    def stop_test(self, notify=True):
+        # Stop acquisition first so readings still in the ring are delivered while running.
+        if self.acquisition is not None:
+            self.acquisition.stop()
+            self.acquisition = None
         self.running = False
         self.start_button.config(state="normal")
         self.stop_button.config(state="disabled")
-        if self.thread is not None:
-            self.thread.join(timeout=2)
         self.update_summary_tree()
+        if self.session_id is not None:
+            end_test_session(self.session_id, self.journal.last_seq)
+        self.publish_session()
+        self.save_preview_data()
         self.status_var.set("Test stopped and summary updated.")
-        messagebox.showinfo("Test Stopped", "Test stopped and summary updated.")
-
-    def run_serial(self):
-        port = self.port_var.get()
-        try:
-            read_from_serial(port, BAUD_RATE, self.serial_callback, self.stop_event)
-        except Exception as e:
-            print("Error in serial reading:", e)
+        if notify:
+            messagebox.showinfo("Test Stopped", "Test stopped and summary updated.")
 
-    def serial_callback(self, target_torque):
+    def on_reading(self, reading, fit_indices, received_at=None):
+        # Runs on the acquisition consumer thread; matching already happened in the acquisition process.
         if not self.running or not self.selected_row:
             return
-        fits = find_fits_in_selected_row(target_torque, self.selected_row)
+        target_torque = reading.value
+        self.metrics.increment("readings_received")
+        self.sample_queue.put(target_torque)
+        if self.stream_server is not None:
+            self.stream_server.publish_reading(target_torque, fit_indices)
+        fits = [{"allowance_index": i, "range_str": self.selected_row[f"allowance{i}"]} for i in fit_indices]
         if fits:
-            self.result_queue.put((target_torque, fits))
+            self.metrics.increment("readings_matched")
+            self.metrics.observe("matched", received_at)
+            accepted = []
+            for fit in fits:
+                allowance_key = f"allowance{fit['allowance_index']}"
+                if self.allowance_counts[allowance_key] < 5:
+                    seq = self.journal.append(target_torque, self.selected_row["id"], fit['allowance_index'],
+                                              fit['range_str'])
+                    self.journal_received_at[seq] = received_at
+                    self.allowance_counts[allowance_key] += 1
+                    accepted.append(fit)
+            if accepted:
+                self.metrics.observe("journaled", received_at)
+                self.result_queue.put((target_torque, accepted, received_at))
+
+    def on_readings_lost(self, count):
+        self.metrics.increment("readings_lost", count)
+
+    def on_journal_drained(self, records):
+        # Runs on the drain thread. Readings replayed from a previous run have no receipt time here.
+        for record in records:
+            self.metrics.observe("committed", self.journal_received_at.pop(record["seq"], None))
 
     def process_queue(self):
         try:
             while True:
-                target_torque, fits = self.result_queue.get_nowait()
+                self.live_plot.append(self.sample_queue.get_nowait())
+        except queue.Empty:
+            pass
+        self.live_plot.redraw()
+        self.metrics.set_gauge("result_queue_depth", self.result_queue.qsize())
+        try:
+            while True:
+                target_torque, fits, received_at = self.result_queue.get_nowait()
+                self.metrics.observe("dequeued", received_at)
                 for fit in fits:
-                    allowance_key = f"allowance{fit['allowance_index']}"
-                    if self.allowance_counts[allowance_key] < 5:
-                        insert_raw_data(target_torque, self.selected_row["id"], allowance_key, fit['range_str'])
-                        self.allowance_counts[allowance_key] += 1
-                        if fit['range_str'] not in self.results_by_range:
-                            self.results_by_range[fit['range_str']] = []
-                        self.results_by_range[fit['range_str']].append(target_torque)
+                    if fit['range_str'] not in self.results_by_range:
+                        self.results_by_range[fit['range_str']] = []
+                    self.results_by_range[fit['range_str']].append(target_torque)
                 self.update_summary_tree()
+                self.metrics.observe("rendered", received_at)
+                self.publish_session()
         except queue.Empty:
             pass
+        self.update_metrics_overlay()
         self.root.after(100, self.process_queue)
 
+    def publish_session(self):
+        if self.stream_server is None:
+            return
+        row = self.selected_row or {}
+        self.stream_server.publish_session({
+            "running": self.running,
+            "torque_table_id": row.get("id"),
+            "max_torque": row.get("max_torque"),
+            "unit": row.get("unit"),
+            "tool_type": row.get("type"),
+            "customer": self.customer_info.get("customer"),
+            "results": {rng: [v for v in values if isinstance(v, float)]
+                        for rng, values in self.results_by_range.items()}
+        })
+
+    def toggle_metrics_overlay(self):
+        if self.show_metrics_overlay.get():
+            self.metrics_label.pack(side="right")
+            self._overlay_ticks = 0
+            self.update_metrics_overlay()
+        else:
+            self.metrics_label.pack_forget()
+
+    def update_metrics_overlay(self):
+        # Refresh roughly once a second so the overlay itself stays cheap.
+        if not self.show_metrics_overlay.get():
+            return
+        self._overlay_ticks -= 1
+        if self._overlay_ticks > 0:
+            return
+        self._overlay_ticks = 10
+        self.metrics_var.set(self.metrics.summary() or "No readings yet")
+
+    def export_metrics(self):
+        file_path = filedialog.asksaveasfilename(defaultextension=".prom",
+                                                 filetypes=[("Metrics files", "*.prom"), ("Text files", "*.txt")])
+        if not file_path:
+            return
+        try:
+            self.metrics.write_file(file_path)
+            self.status_var.set(f"Metrics exported to {file_path}")
+        except OSError as e:
+            messagebox.showerror("Export Error", f"An error occurred while exporting metrics:\n{e}")
+
     def update_summary_tree(self):
         for item in self.tree.get_children():
             self.tree.delete(item)
@@ -349,7 +583,7 @@ class TorqueAppGUI:
             ]
             self.tree.insert("", "end", values=row_values)
             actual_numbers = [v for v in test_values if isinstance(v, float)]
-            insert_summary(allow_str, actual_numbers)
+            insert_summary(allow_str, actual_numbers, session_id=self.session_id)
 
     # ---------------- Manage Tab ----------------
     def setup_manage_tab(self):
@@ -384,6 +618,8 @@ class TorqueAppGUI:
         self.edit_button.grid(row=2, column=1, pady=10, padx=5)
         self.update_button = ttk.Button(bottom_frame, text="Update Entry", command=self.update_torque_entry)
         self.update_button.grid(row=2, column=2, pady=10, padx=5)
+        self.import_button = ttk.Button(bottom_frame, text="Import CSV...", command=self.import_torque_csv)
+        self.import_button.grid(row=2, column=3, pady=10, padx=5)
         top_frame = ttk.Frame(self.manage_frame)
         top_frame.pack(fill="both", expand=True, padx=5, pady=5)
         columns = ("ID", "Max Torque", "Type", "Unit", "Applied Torq", "Allowance1", "Allowance2", "Allowance3")
@@ -409,17 +645,19 @@ class TorqueAppGUI:
             self.entry_applied_3.set_placeholder(str(applied3))
 
     def refresh_type_and_unit_lists(self):
-        self.type_combo['values'] = get_all_types()
-        self.unit_combo['values'] = get_all_units()
+        self.type_combo['values'] = self.torque_cache.types()
+        self.unit_combo['values'] = self.torque_cache.units()
         if self.type_combo['values']:
             self.type_combo.current(0)
         if self.unit_combo['values']:
             self.unit_combo.current(0)
 
     def refresh_manage_tree(self):
-        for item in self.manage_tree.get_children():
-            self.manage_tree.delete(item)
-        table_data = get_torque_table()
+        table_data = self.torque_cache.rows()
+        if self.torque_cache.version is not None and self.torque_cache.version == self._manage_tree_version:
+            return
+        self._manage_tree_version = self.torque_cache.version
+        self.manage_tree.delete(*self.manage_tree.get_children())
         for row in table_data:
             self.manage_tree.insert("", "end", values=(
                 row["id"],
@@ -460,6 +698,37 @@ class TorqueAppGUI:
         self.refresh_torque_dropdown()
         self.refresh_type_and_unit_lists()
 
+    def import_torque_csv(self):
+        file_path = filedialog.askopenfilename(filetypes=[("CSV files", "*.csv"), ("All files", "*.*")])
+        if not file_path:
+            return
+        replace = messagebox.askyesnocancel(
+            "Import CSV",
+            "Replace existing entries with the same max torque, type and unit?\n"
+            "Yes = replace, No = skip them.")
+        if replace is None:
+            return
+
+        def report_progress(done, total):
+            self.status_var.set(f"Importing torque table... {done}/{total}")
+            self.root.update_idletasks()
+
+        try:
+            result = import_torque_csv(file_path, on_conflict="replace" if replace else "skip",
+                                       progress=report_progress)
+        except (OSError, UnicodeDecodeError, sqlite3.Error) as e:
+            messagebox.showerror("Import Error", f"An error occurred while importing:\n{e}")
+            return
+        message = (f"Inserted: {result['inserted']}\nUpdated: {result['updated']}\n"
+                   f"Skipped: {result['skipped']}\nInvalid rows: {len(result['errors'])}")
+        if result["errors"]:
+            message += "\n\n" + "\n".join(f"Line {n}: {msg}" for n, msg in result["errors"][:10])
+        messagebox.showinfo("Import CSV", message)
+        self.status_var.set("Torque table import finished.")
+        self.refresh_manage_tree()
+        self.refresh_torque_dropdown()
+        self.refresh_type_and_unit_lists()
+
     def load_selected_entry(self):
         selection = self.manage_tree.selection()
         if not selection:
@@ -542,7 +811,15 @@ class TorqueAppGUI:
         ttk.Label(self.export_frame, text="The Template Editor will open in a separate window.").pack(pady=5)
 
     def open_template_editor(self):
-        subprocess.Popen([sys.executable, "template_editor.py"])
+        self.save_preview_data()
+        subprocess.Popen([sys.executable, "template_editor.py", PREVIEW_DATA_FILE])
+
+    def save_preview_data(self):
+        # The template editor's live preview reads the current session from this file.
+        try:
+            write_preview_data(self.generate_rows_html(), self.customer_info)
+        except OSError as e:
+            print("Could not save preview data:", e)
 
     def get_template_content(self):
         try:
@@ -565,16 +842,13 @@ class TorqueAppGUI:
         template_content = self.get_template_content()
         if template_content is None:
             return
-        rows_html = self.generate_rows_html()
-        final_html = template_content.replace("{{ rows }}", rows_html)
-        if self.customer_info:
-            for key, value in self.customer_info.items():
-                final_html = final_html.replace("{{ " + key + " }}", value)
+        final_html = render_report_html(template_content, self.generate_rows_html(), self.customer_info)
         file_path = filedialog.asksaveasfilename(defaultextension=".pdf", filetypes=[("PDF files", "*.pdf")])
         if not file_path:
             return
         try:
-            pdfkit.from_string(final_html, file_path)
+            # Reuses the PDF rendered by Preview (or any earlier export of the same report).
+            shutil.copyfile(render_pdf_cached(final_html), file_path)
             messagebox.showinfo("Export PDF", f"PDF exported successfully to {file_path}")
         except Exception as e:
             messagebox.showerror("Export Error", f"An error occurred while exporting PDF:\n{e}")
@@ -583,16 +857,9 @@ class TorqueAppGUI:
         template_content = self.get_template_content()
         if template_content is None:
             return
-        rows_html = self.generate_rows_html()
-        final_html = template_content.replace("{{ rows }}", rows_html)
-        if self.customer_info:
-            for key, value in self.customer_info.items():
-                final_html = final_html.replace("{{ " + key + " }}", value)
+        final_html = render_report_html(template_content, self.generate_rows_html(), self.customer_info)
         try:
-            tmp = tempfile.NamedTemporaryFile(delete=False, suffix=".pdf")
-            tmp.close()
-            pdfkit.from_string(final_html, tmp.name)
-            webbrowser.open_new(tmp.name)
+            webbrowser.open_new(os.path.abspath(render_pdf_cached(final_html)))
         except Exception as e:
             messagebox.showerror("Preview Error", f"An error occurred while previewing PDF:\n{e}")
 
@@ -0,0 +1,222 @@
+import tkinter as tk
+from tkinter import ttk
+from array import array
+
+from serial_reader import parse_range
+
+
+class SampleHistory:
+    """
+    Stores every sample of a session together with a min/max pyramid.
+    Level k of the pyramid holds the min and max of each block of 2**k samples,
+    so any window can be decimated by walking at most ~2 blocks per bucket.
+    """
+    def __init__(self):
+        self.values = array("d")
+        self._mins = []
+        self._maxs = []
+
+    def __len__(self):
+        return len(self.values)
+
+    def clear(self):
+        self.values = array("d")
+        self._mins = []
+        self._maxs = []
+
+    def append(self, value: float) -> None:
+        self.values.append(value)
+        lo_src, hi_src = self.values, self.values
+        level = 0
+        # Each time a level gains an even-numbered entry, fold the last pair upward.
+        while len(lo_src) % 2 == 0:
+            if level == len(self._mins):
+                self._mins.append(array("d"))
+                self._maxs.append(array("d"))
+            self._mins[level].append(min(lo_src[-2], lo_src[-1]))
+            self._maxs[level].append(max(hi_src[-2], hi_src[-1]))
+            lo_src, hi_src = self._mins[level], self._maxs[level]
+            level += 1
+
+    def decimate(self, start: int, stop: int, buckets: int) -> list:
+        """
+        Returns a list of (first_index, low, high) tuples covering samples [start, stop),
+        at most about 'buckets' long regardless of how many samples the window spans.
+        """
+        start = max(0, start)
+        stop = min(len(self.values), stop)
+        if stop <= start or buckets <= 0:
+            return []
+        span = stop - start
+        if span <= buckets:
+            return [(i, self.values[i], self.values[i]) for i in range(start, stop)]
+        # Pick the coarsest level whose blocks are no wider than one bucket.
+        level = 0
+        while level < len(self._mins) and (2 << level) <= span // buckets:
+            level += 1
+        if level == 0:
+            lows, highs, size = self.values, self.values, 1
+        else:
+            lows, highs, size = self._mins[level - 1], self._maxs[level - 1], 1 << level
+        first_block = -(-start // size)
+        last_block = min(len(lows), stop // size)
+        points = []
+        # Partial blocks at either edge are folded into a single point each.
+        head_stop = min(first_block * size, stop)
+        if head_stop > start:
+            head = self.values[start:head_stop]
+            points.append((start, min(head), max(head)))
+        if last_block > first_block:
+            per_bucket = max(1, -(-(last_block - first_block) // buckets))
+            for b in range(first_block, last_block, per_bucket):
+                end = min(b + per_bucket, last_block)
+                points.append((b * size, min(lows[b:end]), max(highs[b:end])))
+        tail_start = max(last_block * size, head_stop)
+        if stop > tail_start:
+            tail = self.values[tail_start:stop]
+            points.append((tail_start, min(tail), max(tail)))
+        return points
+
+    def value_range(self, start: int, stop: int, buckets: int = 64):
+        """Returns (low, high) of the samples in [start, stop) using the pyramid."""
+        points = self.decimate(start, stop, buckets)
+        if not points:
+            return None
+        return min(p[1] for p in points), max(p[2] for p in points)
+
+
+class LivePlot(ttk.Frame):
+    """
+    Canvas-based plot of the incoming torque stream with the allowance bands
+    of the selected row drawn behind it. Redraws are decimated to the canvas width.
+    """
+    BAND_COLORS = ("#d7f0d7", "#d7e6f5", "#f5ecd7")
+
+    def __init__(self, master=None, window_size=600, height=180, **kwargs):
+        super().__init__(master, **kwargs)
+        self.history = SampleHistory()
+        self.window_size = window_size
+        self.bands = []
+        self.follow = tk.BooleanVar(value=True)
+        self._dirty = True
+        self._view_start = 0
+
+        self.canvas = tk.Canvas(self, height=height, background="white", highlightthickness=0)
+        self.canvas.grid(row=0, column=0, columnspan=2, sticky="nsew")
+        self.scrollbar = ttk.Scrollbar(self, orient="horizontal", command=self.on_scroll)
+        self.scrollbar.grid(row=1, column=0, sticky="ew")
+        follow_check = ttk.Checkbutton(self, text="Follow", variable=self.follow, command=self.mark_dirty)
+        follow_check.grid(row=1, column=1, padx=5)
+        self.columnconfigure(0, weight=1)
+        self.rowconfigure(0, weight=1)
+        self.canvas.bind("<Configure>", lambda e: self.mark_dirty())
+        self.canvas.bind("<MouseWheel>", lambda e: self.zoom(0.5 if e.delta > 0 else 2.0))
+        self.canvas.bind("<Button-4>", lambda e: self.zoom(0.5))
+        self.canvas.bind("<Button-5>", lambda e: self.zoom(2.0))
+
+    def mark_dirty(self):
+        self._dirty = True
+
+    def clear(self):
+        self.history.clear()
+        self._view_start = 0
+        self.follow.set(True)
+        self.mark_dirty()
+
+    def append(self, value: float) -> None:
+        self.history.append(value)
+        self._dirty = True
+
+    def set_bands(self, row: dict) -> None:
+        """Uses allowance1..3 of a torque table row as the bands to draw."""
+        self.bands = []
+        if row:
+            for i in range(1, 4):
+                try:
+                    self.bands.append(parse_range(row[f"allowance{i}"]))
+                except (KeyError, ValueError, AttributeError):
+                    continue
+        self.mark_dirty()
+
+    def zoom(self, factor: float) -> None:
+        """Scales the visible window; zooming out far enough shows the whole session."""
+        total = len(self.history)
+        stop = self._view_start + self.window_size
+        self.window_size = int(min(max(50, self.window_size * factor), max(50, total)))
+        self._view_start = max(0, stop - self.window_size)
+        self.mark_dirty()
+        self.redraw()
+
+    def on_scroll(self, action, *args):
+        total = len(self.history)
+        if action == "moveto":
+            self._view_start = int(float(args[0]) * total)
+        elif action == "scroll":
+            step = self.window_size if args[1] == "pages" else max(1, self.window_size // 10)
+            self._view_start += int(args[0]) * step
+        self._view_start = max(0, min(self._view_start, total - self.window_size))
+        self.follow.set(self._view_start + self.window_size >= total)
+        self.mark_dirty()
+        self.redraw()
+
+    def redraw(self):
+        """Redraws the visible window if anything changed since the last call."""
+        if not self._dirty:
+            return
+        self._dirty = False
+        width = self.canvas.winfo_width()
+        height = self.canvas.winfo_height()
+        if width <= 1 or height <= 1:
+            return
+        total = len(self.history)
+        if self.follow.get():
+            self._view_start = max(0, total - self.window_size)
+        start = self._view_start
+        stop = min(total, start + self.window_size)
+        if total:
+            self.scrollbar.set(start / total, stop / total)
+        else:
+            self.scrollbar.set(0.0, 1.0)
+
+        self.canvas.delete("all")
+        low, high = self._y_limits(start, stop)
+        scale_y = (height - 10) / (high - low)
+
+        def to_y(v):
+            return height - 5 - (v - low) * scale_y
+
+        for (b_low, b_high), color in zip(self.bands, self.BAND_COLORS):
+            self.canvas.create_rectangle(0, to_y(b_high), width, to_y(b_low), fill=color, outline="")
+        self.canvas.create_text(4, 4, anchor="nw", text=f"{high:.1f}", fill="grey")
+        self.canvas.create_text(4, height - 4, anchor="sw", text=f"{low:.1f}", fill="grey")
+
+        points = self.history.decimate(start, stop, width)
+        if not points:
+            return
+        scale_x = width / max(1, self.window_size - 1)
+        coords = []
+        for index, p_low, p_high in points:
+            x = (index - start) * scale_x
+            coords.extend((x, to_y(p_low)))
+            if p_high != p_low:
+                coords.extend((x, to_y(p_high)))
+        if len(coords) >= 4:
+            self.canvas.create_line(*coords, fill="#1f5fbf")
+        else:
+            x, y = coords
+            self.canvas.create_oval(x - 2, y - 2, x + 2, y + 2, fill="#1f5fbf", outline="")
+
+    def _y_limits(self, start, stop):
+        lows = [b[0] for b in self.bands]
+        highs = [b[1] for b in self.bands]
+        data_range = self.history.value_range(start, stop)
+        if data_range:
+            lows.append(data_range[0])
+            highs.append(data_range[1])
+        if not lows:
+            return 0.0, 1.0
+        low, high = min(lows), max(highs)
+        if high - low < 1e-9:
+            low, high = low - 1.0, high + 1.0
+        margin = (high - low) * 0.05
+        return low - margin, high + margin
@@ -0,0 +1,138 @@
+import threading
+import time
+from bisect import bisect_left
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Histogram bucket upper bounds in seconds (1 ms up to 10 s).
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Acquisition pipeline stages, in order. Each latency is measured from the
+# moment the serial bytes of a reading were received.
+PIPELINE_STAGES = ("parsed", "matched", "journaled", "dequeued", "committed", "rendered")
+
+
+class Histogram:
+    """A fixed-bucket latency histogram, cheap enough to update per reading."""
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.total += value
+
+    def quantile(self, q: float):
+        """Returns the upper bound of the bucket holding quantile q, or None if empty."""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for bound, n in zip(self.buckets, self.counts):
+            seen += n
+            if seen >= rank:
+                return bound
+        return float("inf")
+
+
+class PipelineMetrics:
+    """
+    Collects per-stage latency histograms, reading counters and queue-depth gauges
+    for the acquisition pipeline. All methods are safe to call from any thread.
+    """
+    def __init__(self, stages=PIPELINE_STAGES):
+        self._lock = threading.Lock()
+        self.histograms = {stage: Histogram() for stage in stages}
+        self.gauges = {}
+        self.counters = {"readings_received": 0, "readings_matched": 0}
+        self.started_at = time.time()
+
+    def observe(self, stage: str, received_at: float) -> None:
+        """Records the latency of 'stage' for a reading received at 'received_at' (perf_counter)."""
+        if received_at is None:
+            return
+        elapsed = time.perf_counter() - received_at
+        with self._lock:
+            self.histograms[stage].observe(elapsed)
+
+    def observe_elapsed(self, stage: str, elapsed: float) -> None:
+        """Records an already measured latency for 'stage'."""
+        with self._lock:
+            self.histograms[stage].observe(elapsed)
+
+    def increment(self, counter: str, amount: int = 1) -> None:
+        with self._lock:
+            self.counters[counter] = self.counters.get(counter, 0) + amount
+
+    def set_gauge(self, name: str, value: float) -> None:
+        self.gauges[name] = value
+
+    def summary(self) -> str:
+        """Returns a one-line summary suitable for the status bar overlay."""
+        with self._lock:
+            parts = []
+            for stage in ("matched", "journaled", "committed", "rendered"):
+                hist = self.histograms.get(stage)
+                if hist is None or not hist.count:
+                    continue
+                p50 = hist.quantile(0.5) * 1000
+                p95 = hist.quantile(0.95) * 1000
+                parts.append(f"{stage} p50<={p50:g}ms p95<={p95:g}ms")
+            parts.extend(f"{name}={value:g}" for name, value in sorted(self.gauges.items()))
+            parts.append(f"rx={self.counters.get('readings_received', 0)}")
+        return " | ".join(parts)
+
+    def to_prometheus(self) -> str:
+        """Renders all metrics in the Prometheus text exposition format."""
+        lines = []
+        with self._lock:
+            lines.append("# HELP torque_stage_latency_seconds Latency from serial receipt to each pipeline stage.")
+            lines.append("# TYPE torque_stage_latency_seconds histogram")
+            for stage, hist in self.histograms.items():
+                cumulative = 0
+                for bound, n in zip(hist.buckets, hist.counts):
+                    cumulative += n
+                    lines.append(f'torque_stage_latency_seconds_bucket{{stage="{stage}",le="{bound}"}} {cumulative}')
+                lines.append(f'torque_stage_latency_seconds_bucket{{stage="{stage}",le="+Inf"}} {hist.count}')
+                lines.append(f'torque_stage_latency_seconds_sum{{stage="{stage}"}} {hist.total}')
+                lines.append(f'torque_stage_latency_seconds_count{{stage="{stage}"}} {hist.count}')
+            for name, value in sorted(self.counters.items()):
+                lines.append(f"# TYPE torque_{name}_total counter")
+                lines.append(f"torque_{name}_total {value}")
+            for name, value in sorted(self.gauges.items()):
+                lines.append(f"# TYPE torque_{name} gauge")
+                lines.append(f"torque_{name} {value}")
+        return "\n".join(lines) + "\n"
+
+    def write_file(self, path: str) -> None:
+        """Writes the Prometheus text snapshot to a local file."""
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(self.to_prometheus())
+
+
+def start_metrics_server(metrics: PipelineMetrics, port: int, host: str = "127.0.0.1"):
+    """
+    Serves metrics.to_prometheus() at /metrics from a daemon thread.
+    Returns the server so the caller can shut it down.
+    """
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.rstrip("/") != "/metrics":
+                self.send_error(404)
+                return
+            body = metrics.to_prometheus().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
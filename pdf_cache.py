@@ -0,0 +1,61 @@
+import hashlib
+import json
+import os
+import tempfile
+
+import pdfkit
+
+PDF_CACHE_DIR = "pdf_cache"
+PDF_CACHE_MAX_BYTES = 200 * 1024 * 1024
+
+def pdf_cache_key(html: str, options: dict = None) -> str:
+    """Hash of the final HTML and the renderer options; identical inputs give identical PDFs."""
+    digest = hashlib.sha256()
+    digest.update(json.dumps(options or {}, sort_keys=True).encode("utf-8"))
+    digest.update(b"\0")
+    digest.update(html.encode("utf-8"))
+    return digest.hexdigest()
+
+def render_pdf_cached(html: str, options: dict = None, cache_dir: str = PDF_CACHE_DIR,
+                      max_bytes: int = PDF_CACHE_MAX_BYTES) -> str:
+    """
+    Returns the path of a PDF rendered from 'html', running wkhtmltopdf only on a cache miss.
+    Hits refresh the file's modification time, which is what LRU eviction orders by.
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    path = os.path.join(cache_dir, pdf_cache_key(html, options) + ".pdf")
+    if os.path.exists(path):
+        os.utime(path)
+        return path
+    fd, tmp_path = tempfile.mkstemp(suffix=".pdf.tmp", dir=cache_dir)
+    os.close(fd)
+    try:
+        pdfkit.from_string(html, tmp_path, options=options)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    evict_pdf_cache(cache_dir, max_bytes, keep=path)
+    return path
+
+def evict_pdf_cache(cache_dir: str = PDF_CACHE_DIR, max_bytes: int = PDF_CACHE_MAX_BYTES, keep: str = None) -> None:
+    """Removes least recently used PDFs until the cache is no larger than max_bytes."""
+    entries = []
+    total = 0
+    with os.scandir(cache_dir) as it:
+        for entry in it:
+            if entry.is_file() and entry.name.endswith(".pdf"):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+                total += stat.st_size
+    entries.sort()
+    for _, size, path in entries:
+        if total <= max_bytes:
+            break
+        if keep is not None and os.path.abspath(path) == os.path.abspath(keep):
+            continue
+        try:
+            os.remove(path)
+        except OSError:
+            continue
+        total -= size
@@ -0,0 +1,195 @@
+import mmap
+import os
+import struct
+import threading
+import time
+import zlib
+
+from db_handler import DB_FILE, insert_raw_data_batch, get_max_journal_seq
+
+JOURNAL_FILE = "readings.journal"
+
+# Header: magic, format version, record size, sequence number drained into the DB.
+HEADER = struct.Struct("<4sHHQ")
+HEADER_SIZE = 64
+MAGIC = b"TQJ1"
+VERSION = 1
+
+# Record: seq, wall-clock timestamp, torque, torque table id, allowance index,
+# allowance range string, CRC32 of everything before it.
+RECORD = struct.Struct("<QddiB3x32sI4x")
+RECORD_BODY = RECORD.size - 8
+
+DEFAULT_CAPACITY = 4096
+
+
+class ReadingJournal:
+    """
+    Memory-mapped, append-only journal of accepted readings.
+    The acquisition thread appends fixed-size records without touching SQLite;
+    drain_journal() later copies them into RawData and records the drained
+    sequence number in the header. Records carry a CRC so a torn write at the
+    tail is ignored when the journal is reopened after a crash. Sequence numbers
+    continue after the highest one already in RawData, so a deleted or recreated
+    journal file cannot reuse numbers that the database would ignore as duplicates.
+    """
+    def __init__(self, path: str = JOURNAL_FILE, capacity: int = DEFAULT_CAPACITY, sync: bool = True,
+                 db_file: str = DB_FILE):
+        self.path = path
+        self.sync = sync
+        self._db_seq = get_max_journal_seq(db_file)
+        self._lock = threading.Lock()
+        new_file = not os.path.exists(path) or os.path.getsize(path) < HEADER_SIZE
+        self._file = open(path, "a+b" if new_file else "r+b")
+        if new_file:
+            self._file.truncate(HEADER_SIZE + capacity * RECORD.size)
+        self._mm = mmap.mmap(self._file.fileno(), 0)
+        if new_file:
+            HEADER.pack_into(self._mm, 0, MAGIC, VERSION, RECORD.size, 0)
+            self._mm.flush()
+        magic, version, record_size, drained_seq = HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC or version != VERSION or record_size != RECORD.size:
+            self._mm.close()
+            self._file.close()
+            raise ValueError(f"{path} is not a reading journal of a supported version.")
+        self.drained_seq = drained_seq
+        self._scan()
+
+    def _scan(self) -> None:
+        """Finds the end of the valid record run written since the last reset."""
+        offset = HEADER_SIZE
+        last_seq = None
+        while offset + RECORD.size <= len(self._mm):
+            record = self._read_record(offset)
+            if record is None or (last_seq is not None and record[0] != last_seq + 1):
+                break
+            last_seq = record[0]
+            offset += RECORD.size
+        self._write_offset = offset
+        self._start_seq = None if last_seq is None else last_seq - (offset - HEADER_SIZE) // RECORD.size + 1
+        self.last_seq = max(last_seq or 0, self.drained_seq, self._db_seq)
+
+    def _read_record(self, offset: int):
+        values = RECORD.unpack_from(self._mm, offset)
+        seq, crc = values[0], values[6]
+        if seq == 0 or zlib.crc32(self._mm[offset:offset + RECORD_BODY]) != crc:
+            return None
+        return values
+
+    def _grow(self) -> None:
+        size = len(self._mm)
+        self._mm.close()
+        self._file.truncate(HEADER_SIZE + (size - HEADER_SIZE) * 2)
+        self._mm = mmap.mmap(self._file.fileno(), 0)
+
+    def append(self, target: float, torque_table_id: int, allowance_index: int, range_str: str,
+               timestamp: float = None) -> int:
+        """Appends one accepted reading and returns its sequence number."""
+        timestamp = time.time() if timestamp is None else timestamp
+        with self._lock:
+            if self.drained_seq == self.last_seq and self._write_offset > HEADER_SIZE:
+                # Everything written so far is in the database: start over at the top.
+                self._write_offset = HEADER_SIZE
+                self._start_seq = None
+            if self._write_offset + RECORD.size > len(self._mm):
+                self._grow()
+            seq = self.last_seq + 1
+            offset = self._write_offset
+            RECORD.pack_into(self._mm, offset, seq, timestamp, target, torque_table_id, allowance_index,
+                             range_str.encode("utf-8")[:32], 0)
+            crc = zlib.crc32(self._mm[offset:offset + RECORD_BODY])
+            struct.pack_into("<I", self._mm, offset + RECORD_BODY, crc)
+            if self.sync:
+                page_start = offset - offset % mmap.ALLOCATIONGRANULARITY
+                self._mm.flush(page_start, offset + RECORD.size - page_start)
+            self._write_offset = offset + RECORD.size
+            if self._start_seq is None:
+                self._start_seq = seq
+            self.last_seq = seq
+        return seq
+
+    def pending(self) -> list:
+        """
+        Returns the records not yet drained as dicts with seq, timestamp, target,
+        torque_table_id, which_allowance and allowance_range.
+        """
+        with self._lock:
+            if self._start_seq is None or self.last_seq <= self.drained_seq:
+                return []
+            first = max(self.drained_seq + 1, self._start_seq)
+            start = HEADER_SIZE + (first - self._start_seq) * RECORD.size
+            raw = self._mm[start:self._write_offset]
+        records = []
+        for values in RECORD.iter_unpack(raw):
+            seq, timestamp, target, table_id, allowance_index, range_bytes = values[:6]
+            records.append({
+                "seq": seq,
+                "timestamp": timestamp,
+                "target": target,
+                "torque_table_id": table_id,
+                "which_allowance": f"allowance{allowance_index}",
+                "allowance_range": range_bytes.rstrip(b"\0").decode("utf-8", errors="replace")
+            })
+        return records
+
+    def mark_drained(self, seq: int) -> None:
+        """Records that every reading up to 'seq' is committed to the database."""
+        with self._lock:
+            if seq <= self.drained_seq:
+                return
+            self.drained_seq = seq
+            HEADER.pack_into(self._mm, 0, MAGIC, VERSION, RECORD.size, seq)
+            self._mm.flush(0, HEADER_SIZE)
+
+    def close(self) -> None:
+        with self._lock:
+            self._mm.flush()
+            self._mm.close()
+            self._file.close()
+
+
+def open_journal(path: str = JOURNAL_FILE, db_file: str = DB_FILE):
+    """
+    Opens the journal at 'path'. A file that is not a readable journal is renamed
+    aside and a fresh journal is started. Returns (journal, moved_path or None).
+    """
+    try:
+        return ReadingJournal(path, db_file=db_file), None
+    except ValueError:
+        moved = f"{path}.{time.strftime('%Y%m%d-%H%M%S')}.bad"
+        os.replace(path, moved)
+        return ReadingJournal(path, db_file=db_file), moved
+
+def drain_journal(journal: ReadingJournal, db_file: str = DB_FILE) -> list:
+    """
+    Copies pending journal records into RawData in one transaction and marks them drained.
+    Records are keyed by their sequence number, so replaying after a crash between the
+    commit and mark_drained() does not duplicate rows. Returns the drained records.
+    """
+    records = journal.pending()
+    if not records:
+        return []
+    insert_raw_data_batch(records, db_file=db_file)
+    journal.mark_drained(records[-1]["seq"])
+    return records
+
+
+class JournalDrainer(threading.Thread):
+    """Background thread that periodically drains the journal into the database."""
+    def __init__(self, journal: ReadingJournal, interval: float = 0.5, on_drained=None, db_file: str = DB_FILE):
+        super().__init__(daemon=True)
+        self.journal = journal
+        self.interval = interval
+        self.on_drained = on_drained
+        self.db_file = db_file
+        self.stop_event = threading.Event()
+
+    def run(self):
+        while not self.stop_event.wait(self.interval):
+            try:
+                records = drain_journal(self.journal, db_file=self.db_file)
+            except Exception as e:
+                print("Journal drain error:", e)
+                continue
+            if records and self.on_drained:
+                self.on_drained(records)
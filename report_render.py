@@ -0,0 +1,31 @@
+import json
+import os
+
+PREVIEW_DATA_FILE = "preview_data.json"
+
+def render_report_html(template_content: str, rows_html: str, customer_info: dict = None) -> str:
+    """Fills a report template with the results table rows and customer fields."""
+    final_html = template_content.replace("{{ rows }}", rows_html)
+    if customer_info:
+        for key, value in customer_info.items():
+            final_html = final_html.replace("{{ " + key + " }}", value)
+    return final_html
+
+def write_preview_data(rows_html: str, customer_info: dict, path: str = PREVIEW_DATA_FILE) -> None:
+    """
+    Saves the current session's report data for the template editor's live preview.
+    Written to a temporary file and renamed so the editor never reads a partial file.
+    """
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"rows_html": rows_html, "customer_info": customer_info or {}}, f)
+    os.replace(tmp_path, path)
+
+def load_preview_data(path: str = PREVIEW_DATA_FILE) -> dict:
+    """Returns the data saved by write_preview_data, or empty data if there is none."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        data = {}
+    return {"rows_html": data.get("rows_html", ""), "customer_info": data.get("customer_info", {})}
@@ -2,6 +2,8 @@ import serial
 import time
 import re
 
+from decoders import create_decoder, DEFAULT_DECODER
+
 def parse_range(range_str: str):
     """Converts a range string like '67.2 - 72.8' into a tuple of floats (67.2, 72.8)."""
     low_str, high_str = range_str.split('-')
@@ -48,20 +50,24 @@ def find_fits_in_selected_row(target: float, row: dict) -> list:
     fits.sort(key=lambda x: x["diff"])
     return fits
 
-def read_from_serial(port: str, baudrate: int, callback, stop_event) -> None:
+def read_from_serial(port: str, baudrate: int, callback, stop_event, decoder=None) -> None:
     """
-    Opens the serial port and continuously reads lines.
-    When a valid float is parsed, callback(float_value) is invoked.
-    The loop exits when stop_event is set.
+    Opens the serial port and feeds whatever bytes arrive to 'decoder'
+    (an ASCII line decoder by default, see decoders.py).
+    For every decoded reading, callback(reading, received_at) is invoked, where
+    reading is a decoders.Reading and received_at is the time.perf_counter() value
+    at which its bytes arrived. The loop exits when stop_event is set.
     """
+    if decoder is None:
+        decoder = create_decoder(DEFAULT_DECODER)
     try:
-        with serial.Serial(port, baudrate, timeout=1) as ser:
+        with serial.Serial(port, baudrate, timeout=0.1) as ser:
             while not stop_event.is_set():
-                line = ser.readline().decode('utf-8', errors='replace').strip()
-                if line:
-                    target_torque = parse_torque_value(line)
-                    if target_torque is not None:
-                        callback(target_torque)
-                time.sleep(0.01)
+                chunk = ser.read(ser.in_waiting or 1)
+                if not chunk:
+                    continue
+                received_at = time.perf_counter()
+                for reading in decoder.feed(chunk):
+                    callback(reading, received_at)
     except Exception as e:
         print("Serial read error:", e)
@@ -0,0 +1,267 @@
+import asyncio
+import base64
+import hashlib
+import json
+import struct
+import threading
+import time
+from urllib.parse import urlsplit, parse_qs
+
+from db_handler import DB_FILE, get_raw_data_page, get_test_session_page
+
+WEBSOCKET_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+MAX_HEADER_BYTES = 16384
+MAX_CLIENT_FRAME = 65536
+DEFAULT_CLIENT_QUEUE = 256
+MAX_PAGE_SIZE = 1000
+
+
+def encode_text_frame(payload: bytes) -> bytes:
+    """Builds an unmasked, final WebSocket text frame (server-to-client)."""
+    length = len(payload)
+    if length < 126:
+        header = struct.pack("!BB", 0x81, length)
+    elif length < 65536:
+        header = struct.pack("!BBH", 0x81, 126, length)
+    else:
+        header = struct.pack("!BBQ", 0x81, 127, length)
+    return header + payload
+
+
+class _Client:
+    """One WebSocket subscriber with its own bounded outgoing queue."""
+    def __init__(self, writer, queue_size):
+        self.writer = writer
+        self.queue = asyncio.Queue(maxsize=queue_size)
+        self.dropped = 0
+
+    def offer(self, frame: bytes) -> None:
+        # A slow client loses its oldest pending frames instead of holding up anyone else.
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(frame)
+
+
+class StreamServer:
+    """
+    Optional HTTP/WebSocket server that runs its own asyncio loop on a daemon thread.
+
+    - GET /ws            live stream of JSON events ("reading", "session")
+    - GET /api/status    latest session snapshot and subscriber count
+    - GET /api/readings  RawData pages, newest first (?limit=&before_id=&torque_table_id=&session_id=)
+    - GET /api/sessions  test session pages with their results, newest first
+                         (?limit=&before_id=&instrument_id=&customer_id=)
+
+    publish() may be called from any thread and never blocks: each event is
+    encoded once and handed to every subscriber's bounded queue.
+    """
+    def __init__(self, host: str = "127.0.0.1", port: int = 8765, station: str = "",
+                 queue_size: int = DEFAULT_CLIENT_QUEUE, db_file: str = DB_FILE):
+        self.host = host
+        self.port = port
+        self.station = station
+        self.queue_size = queue_size
+        self.db_file = db_file
+        self.clients = set()
+        self.latest_session = None
+        self._latest_session_frame = None
+        self._loop = None
+        self._server = None
+        self._ready = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+        self._ready.wait(5)
+
+    def stop(self) -> None:
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+
+    def _run(self) -> None:
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        try:
+            self._server = self._loop.run_until_complete(
+                asyncio.start_server(self._handle_connection, self.host, self.port))
+        except OSError as e:
+            print("Stream server error:", e)
+            self._ready.set()
+            return
+        self._ready.set()
+        self._loop.run_forever()
+        self._server.close()
+        for client in list(self.clients):
+            client.writer.close()
+        self._loop.close()
+
+    # ---------------- Publishing ----------------
+    def publish(self, event_type: str, data: dict) -> None:
+        """Sends an event to every subscriber. Safe to call from any thread."""
+        if self._loop is None or not self._loop.is_running():
+            return
+        message = {"type": event_type, "station": self.station, "time": time.time()}
+        message.update(data)
+        frame = encode_text_frame(json.dumps(message).encode("utf-8"))
+        self._loop.call_soon_threadsafe(self._fan_out, event_type, message, frame)
+
+    def publish_reading(self, value: float, fit_indices=()) -> None:
+        self.publish("reading", {"value": value, "allowances": list(fit_indices)})
+
+    def publish_session(self, session: dict) -> None:
+        self.publish("session", session)
+
+    def _fan_out(self, event_type, message, frame) -> None:
+        if event_type == "session":
+            self.latest_session = message
+            self._latest_session_frame = frame
+        for client in self.clients:
+            client.offer(frame)
+
+    # ---------------- Connections ----------------
+    async def _handle_connection(self, reader, writer):
+        try:
+            head = await reader.readuntil(b"\r\n\r\n")
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+            writer.close()
+            return
+        if len(head) > MAX_HEADER_BYTES:
+            writer.close()
+            return
+        lines = head.decode("latin-1").split("\r\n")
+        try:
+            method, target, _ = lines[0].split(" ", 2)
+        except ValueError:
+            writer.close()
+            return
+        headers = {}
+        for line in lines[1:]:
+            if ":" in line:
+                key, value = line.split(":", 1)
+                headers[key.strip().lower()] = value.strip()
+        url = urlsplit(target)
+        query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+
+        try:
+            if method != "GET":
+                await self._send_json(writer, 405, {"error": "method not allowed"})
+            elif url.path == "/ws" and headers.get("upgrade", "").lower() == "websocket":
+                await self._serve_websocket(reader, writer, headers)
+                return
+            elif url.path == "/api/status":
+                await self._send_json(writer, 200, {
+                    "station": self.station,
+                    "subscribers": len(self.clients),
+                    "session": self.latest_session
+                })
+            elif url.path == "/api/readings":
+                await self._serve_readings(writer, query)
+            elif url.path == "/api/sessions":
+                await self._serve_sessions(writer, query)
+            else:
+                await self._send_json(writer, 404, {"error": "not found"})
+        except ConnectionError:
+            pass
+        writer.close()
+
+    async def _send_json(self, writer, status: int, body: dict) -> None:
+        payload = json.dumps(body).encode("utf-8")
+        reason = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed"}.get(status, "")
+        writer.write(
+            f"HTTP/1.1 {status} {reason}\r\n"
+            f"Content-Type: application/json\r\n"
+            f"Content-Length: {len(payload)}\r\n"
+            f"Access-Control-Allow-Origin: *\r\n"
+            f"Connection: close\r\n\r\n".encode("latin-1") + payload)
+        await writer.drain()
+
+    async def _serve_readings(self, writer, query) -> None:
+        try:
+            limit = min(max(int(query.get("limit", 100)), 1), MAX_PAGE_SIZE)
+            before_id = int(query["before_id"]) if "before_id" in query else None
+            table_id = int(query["torque_table_id"]) if "torque_table_id" in query else None
+            session_id = int(query["session_id"]) if "session_id" in query else None
+        except ValueError:
+            await self._send_json(writer, 400, {"error": "limit, before_id, torque_table_id and session_id "
+                                                         "must be integers"})
+            return
+        # SQLite work runs on the default executor so the loop keeps serving subscribers.
+        rows = await self._loop.run_in_executor(
+            None, lambda: get_raw_data_page(before_id, limit, table_id, session_id, db_file=self.db_file))
+        next_before = rows[-1]["id"] if len(rows) == limit else None
+        await self._send_json(writer, 200, {"readings": rows, "next_before_id": next_before})
+
+    async def _serve_sessions(self, writer, query) -> None:
+        try:
+            limit = min(max(int(query.get("limit", 50)), 1), MAX_PAGE_SIZE)
+            before_id = int(query["before_id"]) if "before_id" in query else None
+            instrument_id = int(query["instrument_id"]) if "instrument_id" in query else None
+            customer_id = int(query["customer_id"]) if "customer_id" in query else None
+        except ValueError:
+            await self._send_json(writer, 400, {"error": "limit, before_id, instrument_id and customer_id "
+                                                         "must be integers"})
+            return
+        rows = await self._loop.run_in_executor(
+            None, lambda: get_test_session_page(before_id, limit, instrument_id, customer_id, db_file=self.db_file))
+        next_before = rows[-1]["id"] if len(rows) == limit else None
+        await self._send_json(writer, 200, {"sessions": rows, "next_before_id": next_before})
+
+    async def _serve_websocket(self, reader, writer, headers) -> None:
+        key = headers.get("sec-websocket-key")
+        if not key:
+            await self._send_json(writer, 400, {"error": "missing Sec-WebSocket-Key"})
+            writer.close()
+            return
+        accept = base64.b64encode(hashlib.sha1((key + WEBSOCKET_GUID).encode("ascii")).digest()).decode("ascii")
+        writer.write(
+            "HTTP/1.1 101 Switching Protocols\r\n"
+            "Upgrade: websocket\r\n"
+            "Connection: Upgrade\r\n"
+            f"Sec-WebSocket-Accept: {accept}\r\n\r\n".encode("latin-1"))
+        client = _Client(writer, self.queue_size)
+        if self._latest_session_frame:
+            client.offer(self._latest_session_frame)
+        self.clients.add(client)
+        sender = asyncio.ensure_future(self._send_loop(client))
+        try:
+            await self._receive_loop(reader, client)
+        finally:
+            self.clients.discard(client)
+            sender.cancel()
+            writer.close()
+
+    async def _send_loop(self, client) -> None:
+        try:
+            while True:
+                frame = await client.queue.get()
+                client.writer.write(frame)
+                await client.writer.drain()
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+
+    async def _receive_loop(self, reader, client) -> None:
+        """Handles client control frames; data sent by clients is ignored."""
+        try:
+            while True:
+                first, second = await reader.readexactly(2)
+                opcode = first & 0x0F
+                length = second & 0x7F
+                if length == 126:
+                    length = struct.unpack("!H", await reader.readexactly(2))[0]
+                elif length == 127:
+                    length = struct.unpack("!Q", await reader.readexactly(8))[0]
+                if length > MAX_CLIENT_FRAME:
+                    return
+                mask = await reader.readexactly(4) if second & 0x80 else b""
+                payload = await reader.readexactly(length)
+                if mask:
+                    payload = bytes(b ^ mask[i % 4] for i, b in enumerate(payload))
+                if opcode == 0x8:
+                    client.writer.write(b"\x88\x00")
+                    return
+                if opcode == 0x9:
+                    payload = payload[:125]
+                    client.writer.write(struct.pack("!BB", 0x8A, len(payload)) + payload)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            return
@@ -1,19 +1,29 @@
+import os
+import sys
+import webbrowser
 import webview
 import tkinter.filedialog as fd
 
+from report_render import PREVIEW_DATA_FILE, render_report_html, load_preview_data
+from pdf_cache import render_pdf_cached
+
 class EditorAPI:
+    def __init__(self, preview_data_file=PREVIEW_DATA_FILE):
+        self.preview_data_file = preview_data_file
+        self.preview_data = load_preview_data(preview_data_file)
+
     def open_file(self):
         path = fd.askopenfilename(filetypes=[("HTML files", "*.html"), ("All files", "*.*")])
         if path:
             with open(path, "r", encoding="utf-8") as f:
                 return f.read()
         return ""
-    
+
     def save_template(self, content):
         with open("template_saved.html", "w", encoding="utf-8") as f:
             f.write(content)
         return "Template saved successfully."
-    
+
     def save_template_as(self, content):
         path = fd.asksaveasfilename(filetypes=[("HTML files", "*.html"), ("All files", "*.*")])
         if path:
@@ -22,9 +32,25 @@ class EditorAPI:
             return f"Template saved as {path}"
         return "Save cancelled."
 
+    def reload_preview_data(self):
+        self.preview_data = load_preview_data(self.preview_data_file)
+        return "Session data reloaded."
+
+    def render_preview(self, content):
+        """Returns the template filled with the current session's data, as HTML."""
+        return render_report_html(content, self.preview_data["rows_html"], self.preview_data["customer_info"])
+
+    def build_pdf(self, content):
+        try:
+            webbrowser.open_new(os.path.abspath(render_pdf_cached(self.render_preview(content))))
+        except Exception as e:
+            return f"An error occurred while building the PDF: {e}"
+        return "PDF opened."
+
 def main():
-    api = EditorAPI()
-    window = webview.create_window("Template Editor", "editor.html", width=800, height=600, js_api=api)
+    preview_data_file = sys.argv[1] if len(sys.argv) > 1 else PREVIEW_DATA_FILE
+    api = EditorAPI(preview_data_file)
+    window = webview.create_window("Template Editor", "editor.html", width=1200, height=700, js_api=api)
     webview.start(debug=False)
     content = window.evaluate_js("getContent();")
     if content:
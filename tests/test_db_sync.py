@@ -0,0 +1,138 @@
+import sqlite3
+import time
+
+import pytest
+
+from db_handler import (
+    init_db, insert_default_torque_table_data, insert_raw_data, insert_summary, save_customer_info,
+)
+from db_sync import station_identity, sync_station
+
+
+@pytest.fixture
+def benches(tmp_path):
+    """Two benches whose databases are both called data.db, plus an empty central file."""
+    stations = []
+    for name in ("bench1", "bench2"):
+        (tmp_path / name).mkdir()
+        db_file = str(tmp_path / name / "data.db")
+        init_db(db_file)
+        insert_default_torque_table_data(db_file)
+        stations.append(db_file)
+    return stations, str(tmp_path / "central.db")
+
+
+def query(db_file, sql, params=()):
+    with sqlite3.connect(db_file) as conn:
+        return conn.execute(sql, params).fetchall()
+
+
+def add_readings(db_file, values):
+    torque_table_id = query(db_file, "SELECT MIN(id) FROM TorqueTable")[0][0]
+    for value in values:
+        insert_raw_data(value, torque_table_id, "allowance1", "67.2 - 72.8", db_file=db_file)
+
+
+def test_two_stations_with_the_same_file_name_sync_into_one_central(benches):
+    (bench1, bench2), central = benches
+    add_readings(bench1, [70.0, 71.0, 69.5])
+    add_readings(bench2, [68.0, 72.0])
+    insert_summary("67.2 - 72.8", [70.0], db_file=bench2)
+
+    assert sync_station(bench1, central)["raw_data"] == 3
+    result = sync_station(bench2, central)
+    assert result["raw_data"] == 2 and result["summary"] == 1
+
+    id1, _ = station_identity(bench1)
+    id2, _ = station_identity(bench2)
+    assert id1 != id2
+    assert sorted(query(central, "SELECT station, COUNT(*) FROM RawData GROUP BY station")) == \
+        sorted([(id1, 3), (id2, 2)])
+    # Readings point at the central copy of their torque table row.
+    assert query(central, """
+        SELECT COUNT(*) FROM RawData r JOIN TorqueTable t ON t.id = r.torque_table_id
+        WHERE t.max_torque = 75
+    """) == [(5,)]
+    # The identical default rows of both benches are one entry centrally.
+    assert query(central, "SELECT COUNT(*) FROM TorqueTable") == [(6,)]
+
+
+def test_rerunning_a_sync_copies_nothing_twice(benches):
+    (bench1, _), central = benches
+    add_readings(bench1, [float(v) for v in range(25)])
+    assert sync_station(bench1, central, batch_size=10)["raw_data"] == 25
+    again = sync_station(bench1, central, batch_size=10)
+    assert again["raw_data"] == 0 and again["summary"] == 0
+    assert again["torque_table_up"] == 0 and again["torque_table_down"] == 0
+    add_readings(bench1, [99.0])
+    assert sync_station(bench1, central)["raw_data"] == 1
+    assert query(central, "SELECT COUNT(*) FROM RawData") == [(26,)]
+
+
+def test_torque_table_edit_reaches_the_other_station(benches):
+    (bench1, bench2), central = benches
+    sync_station(bench1, central)
+    sync_station(bench2, central)
+    time.sleep(0.01)
+    with sqlite3.connect(bench1) as conn:
+        conn.execute("UPDATE TorqueTable SET allowance1 = '67.0 - 73.0' WHERE max_torque = 75")
+    sync_station(bench1, central)
+    sync_station(bench2, central)
+    assert query(bench2, "SELECT allowance1 FROM TorqueTable WHERE max_torque = 75") == [("67.0 - 73.0",)]
+    assert query(central, "SELECT allowance1 FROM TorqueTable WHERE max_torque = 75") == [("67.0 - 73.0",)]
+
+
+def test_later_edit_wins_a_conflict(benches):
+    (bench1, bench2), central = benches
+    sync_station(bench1, central)
+    sync_station(bench2, central)
+    with sqlite3.connect(bench1) as conn:
+        conn.execute("UPDATE TorqueTable SET allowance1 = 'from bench1' WHERE max_torque = 75")
+    time.sleep(0.01)
+    with sqlite3.connect(bench2) as conn:
+        conn.execute("UPDATE TorqueTable SET allowance1 = 'from bench2' WHERE max_torque = 75")
+    for _ in range(2):
+        sync_station(bench1, central)
+        sync_station(bench2, central)
+    for db_file in (bench1, bench2, central):
+        assert query(db_file, "SELECT allowance1 FROM TorqueTable WHERE max_torque = 75") == [("from bench2",)]
+
+
+def test_deletion_propagates(benches):
+    (bench1, bench2), central = benches
+    sync_station(bench1, central)
+    sync_station(bench2, central)
+    with sqlite3.connect(bench1) as conn:
+        conn.execute("DELETE FROM TorqueTable WHERE max_torque = 500")
+    sync_station(bench1, central)
+    sync_station(bench2, central)
+    for db_file in (bench2, central):
+        assert query(db_file, "SELECT COUNT(*) FROM TorqueTable WHERE max_torque = 500") == [(0,)]
+        assert query(db_file, "SELECT COUNT(*) FROM TorqueTable") == [(5,)]
+
+
+def test_station_name_is_stored_in_the_station_file(benches):
+    (bench1, _), central = benches
+    sync_station(bench1, central, station="Bench 1")
+    assert station_identity(bench1)[1] == "Bench 1"
+    assert query(central, "SELECT name FROM Station WHERE local = 0") == [("Bench 1",)]
+
+
+def test_syncing_a_database_into_itself_is_refused(benches):
+    (bench1, _), _ = benches
+    with pytest.raises(ValueError):
+        sync_station(bench1, bench1)
+
+
+def test_nameless_customers_are_neither_saved_nor_merged(benches):
+    (bench1, bench2), central = benches
+    with pytest.raises(ValueError):
+        save_customer_info({"customer": " ", "email": "a@example.com"}, bench1)
+    # Blank customers stored before names were required stay on their own bench.
+    for db_file, email in ((bench1, "a@example.com"), (bench2, "b@example.com")):
+        with sqlite3.connect(db_file) as conn:
+            conn.execute("INSERT INTO Customer (name, email) VALUES ('', ?)", (email,))
+    save_customer_info({"customer": "Acme", "serial": "S1"}, bench1)
+    sync_station(bench1, central)
+    sync_station(bench2, central)
+    assert query(central, "SELECT name FROM Customer") == [("Acme",)]
@@ -0,0 +1,93 @@
+import random
+import time
+
+import pytest
+
+from decoders import AsciiLineDecoder, FramedBinaryDecoder, FLAG_HIGH, FLAG_PEAK, Reading
+
+
+def feed_in_chunks(decoder, data: bytes, rng: random.Random) -> list:
+    readings = []
+    pos = 0
+    while pos < len(data):
+        size = rng.randint(1, 64)
+        readings += decoder.feed(data[pos:pos + size])
+        pos += size
+    return readings
+
+
+@pytest.mark.parametrize("decoder_cls", [AsciiLineDecoder, FramedBinaryDecoder])
+def test_random_bytes_never_raise(decoder_cls):
+    rng = random.Random(1234)
+    for _ in range(200):
+        decoder = decoder_cls()
+        data = bytes(rng.randrange(256) for _ in range(rng.randint(0, 2000)))
+        for reading in feed_in_chunks(decoder, data, rng):
+            assert isinstance(reading, Reading)
+
+
+@pytest.mark.parametrize("line, expected", [
+    (b"301.5", Reading(301.5, "", 0, None)),
+    (b"HI 301.5 ft.lb", Reading(301.5, "ft/lbs", FLAG_HIGH, None)),
+    (b"PK -12.0 Nm", Reading(-12.0, "NM", FLAG_PEAK, None)),
+    (b"ERROR 12", None),
+    (b"Battery 12%", None),
+    (b"12.3.4", None),
+])
+def test_ascii_accepts_and_rejects(line, expected):
+    assert AsciiLineDecoder().feed(line + b"\r\n") == ([expected] if expected else [])
+
+
+def test_ascii_overlong_line_is_dropped_up_to_its_newline():
+    decoder = AsciiLineDecoder()
+    assert decoder.feed(b"STATUS " + b"x" * 300) == []
+    assert decoder.feed(b" 42.5\r\n") == []
+    assert decoder.feed(b"43.0\r\n") == [Reading(43.0, "", 0, None)]
+
+
+def test_ascii_lines_split_across_chunks():
+    rng = random.Random(7)
+    values = [round(rng.uniform(-500, 500), 1) for _ in range(1000)]
+    data = b"".join(b"PK %.1f Nm\r\n" % v for v in values)
+    readings = feed_in_chunks(AsciiLineDecoder(), data, rng)
+    assert [r.value for r in readings] == values
+
+
+def test_framed_recovers_every_frame_between_garbage():
+    rng = random.Random(42)
+    frames = []
+    data = bytearray()
+    for i in range(2000):
+        # Garbage is rich in sync and length bytes but never forms a whole sync word.
+        garbage = bytes(rng.choice((0xAA, 0x55, 0x06, rng.randrange(256))) for _ in range(rng.randint(0, 12)))
+        while FramedBinaryDecoder.SYNC in garbage:
+            garbage = garbage.replace(FramedBinaryDecoder.SYNC, b"\xaa")
+        data += garbage
+        value = float(i)
+        frames.append((value, "NM", FLAG_PEAK, i))
+        data += FramedBinaryDecoder.encode(value, "NM", FLAG_PEAK, i)
+    readings = feed_in_chunks(FramedBinaryDecoder(), bytes(data), rng)
+    recovered = [(r.value, r.unit, r.flags, round(r.device_time * 1000)) for r in readings]
+    assert recovered == frames
+
+
+def test_framed_throughput():
+    frame = FramedBinaryDecoder.encode(301.5, "ft/lbs", FLAG_PEAK, 1000)
+    data = frame * 50000
+    decoder = FramedBinaryDecoder()
+    start = time.perf_counter()
+    count = sum(len(decoder.feed(data[i:i + 4096])) for i in range(0, len(data), 4096))
+    elapsed = time.perf_counter() - start
+    assert count == 50000
+    # Far above any serial line rate; catches accidental quadratic behaviour.
+    assert count / elapsed > 20000
+
+
+def test_ascii_throughput():
+    data = b"PK 301.5 ft.lb\r\n" * 50000
+    decoder = AsciiLineDecoder()
+    start = time.perf_counter()
+    count = sum(len(decoder.feed(data[i:i + 4096])) for i in range(0, len(data), 4096))
+    elapsed = time.perf_counter() - start
+    assert count == 50000
+    assert count / elapsed > 20000
@@ -0,0 +1,108 @@
+import os
+import sqlite3
+
+import pytest
+
+from db_handler import init_db, insert_raw_data_batch
+from reading_journal import HEADER_SIZE, RECORD, ReadingJournal, drain_journal, open_journal
+
+
+@pytest.fixture
+def paths(tmp_path):
+    db_file = str(tmp_path / "data.db")
+    init_db(db_file)
+    return str(tmp_path / "readings.journal"), db_file
+
+
+def raw_rows(db_file):
+    with sqlite3.connect(db_file) as conn:
+        return conn.execute("SELECT journal_seq, target_torque FROM RawData ORDER BY journal_seq").fetchall()
+
+
+def test_undrained_readings_are_replayed_after_a_crash(paths):
+    path, db_file = paths
+    journal = ReadingJournal(path, db_file=db_file)
+    for value in (10.0, 20.0, 30.0):
+        journal.append(value, 1, 1, "9.6 - 10.4")
+    # No close(): the process dies with everything still in the mmap.
+    del journal
+
+    reopened = ReadingJournal(path, db_file=db_file)
+    assert [r["target"] for r in drain_journal(reopened, db_file)] == [10.0, 20.0, 30.0]
+    assert drain_journal(reopened, db_file) == []
+    reopened.close()
+    assert raw_rows(db_file) == [(1, 10.0), (2, 20.0), (3, 30.0)]
+
+
+def test_replay_after_commit_before_mark_does_not_duplicate(paths):
+    path, db_file = paths
+    journal = ReadingJournal(path, db_file=db_file)
+    journal.append(10.0, 1, 1, "a")
+    journal.append(20.0, 1, 1, "a")
+    insert_raw_data_batch(journal.pending(), db_file)
+    journal.close()
+
+    reopened = ReadingJournal(path, db_file=db_file)
+    drain_journal(reopened, db_file)
+    reopened.close()
+    assert raw_rows(db_file) == [(1, 10.0), (2, 20.0)]
+
+
+def test_writes_restart_at_the_top_once_everything_is_drained(paths):
+    path, db_file = paths
+    journal = ReadingJournal(path, capacity=4, db_file=db_file)
+    for round_no in range(5):
+        for i in range(3):
+            journal.append(float(round_no * 10 + i), 1, 1, "a")
+        drain_journal(journal, db_file)
+    size = os.path.getsize(path)
+    journal.close()
+    # Never grew past its initial capacity, and numbering kept going.
+    assert size == HEADER_SIZE + 4 * RECORD.size
+    assert [seq for seq, _ in raw_rows(db_file)] == list(range(1, 16))
+
+
+def test_torn_tail_record_is_ignored(paths):
+    path, db_file = paths
+    journal = ReadingJournal(path, db_file=db_file)
+    journal.append(10.0, 1, 1, "a")
+    journal.append(20.0, 1, 1, "a")
+    journal.close()
+    with open(path, "r+b") as f:
+        # Corrupt the torque of the second record, as a half-written record would be.
+        f.seek(HEADER_SIZE + RECORD.size + 16)
+        f.write(b"\xff\xff\xff\xff")
+
+    reopened = ReadingJournal(path, db_file=db_file)
+    assert [r["target"] for r in drain_journal(reopened, db_file)] == [10.0]
+    assert reopened.append(30.0, 1, 1, "a") == 2
+    drain_journal(reopened, db_file)
+    reopened.close()
+    assert raw_rows(db_file) == [(1, 10.0), (2, 30.0)]
+
+
+def test_numbering_continues_after_the_journal_file_is_deleted(paths):
+    path, db_file = paths
+    journal = ReadingJournal(path, db_file=db_file)
+    for value in (1.0, 2.0, 3.0):
+        journal.append(value, 1, 1, "a")
+    drain_journal(journal, db_file)
+    journal.close()
+    os.remove(path)
+
+    journal = ReadingJournal(path, db_file=db_file)
+    for value in (4.0, 5.0, 6.0):
+        journal.append(value, 1, 1, "a")
+    assert len(drain_journal(journal, db_file)) == 3
+    journal.close()
+    assert raw_rows(db_file) == [(1, 1.0), (2, 2.0), (3, 3.0), (4, 4.0), (5, 5.0), (6, 6.0)]
+
+
+def test_unreadable_journal_is_moved_aside(paths):
+    path, db_file = paths
+    with open(path, "wb") as f:
+        f.write(b"not a journal".ljust(HEADER_SIZE + RECORD.size, b"\0"))
+    journal, moved = open_journal(path, db_file)
+    assert moved is not None and os.path.exists(moved)
+    assert journal.append(1.0, 1, 1, "a") == 1
+    journal.close()
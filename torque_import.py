@@ -0,0 +1,121 @@
+import csv
+import json
+import math
+
+from db_handler import DB_FILE, import_torque_table_entries
+from torque_rules import (
+    DEFAULT_TOLERANCE,
+    suggest_applied_torques_bulk,
+    auto_calculate_allowances_bulk
+)
+
+# Header spellings seen in manufacturer catalogs, mapped to TorqueTable columns.
+HEADER_ALIASES = {
+    "max torque": "max_torque",
+    "capacity": "max_torque",
+    "max": "max_torque",
+    "type": "type",
+    "tool type": "type",
+    "unit": "unit",
+    "units": "unit",
+    "applied1": "applied1",
+    "applied torq #1": "applied1",
+    "applied torque 1": "applied1",
+    "applied2": "applied2",
+    "applied torq #2": "applied2",
+    "applied torque 2": "applied2",
+    "applied3": "applied3",
+    "applied torq #3": "applied3",
+    "applied torque 3": "applied3",
+}
+
+def _normalize_header(name: str):
+    return HEADER_ALIASES.get((name or "").strip().lower().replace("_", " "))
+
+def parse_torque_rows(lines, start_line: int = 2):
+    """
+    Validates catalog rows read as CSV from 'lines'.
+    Returns (valid, errors): 'valid' is a list of dicts with max_torque, type, unit and
+    optional explicit applied torques; 'errors' is a list of (line_number, message).
+    """
+    reader = csv.reader(lines)
+    try:
+        header = next(reader)
+    except StopIteration:
+        return [], [(1, "File is empty.")]
+    columns = [_normalize_header(h) for h in header]
+    missing = {"max_torque", "type", "unit"} - set(columns)
+    if missing:
+        return [], [(1, "Missing column(s): " + ", ".join(sorted(missing)))]
+
+    valid = []
+    errors = []
+    for line_no, raw in enumerate(reader, start=start_line):
+        if not any(cell.strip() for cell in raw):
+            continue
+        record = {col: cell.strip() for col, cell in zip(columns, raw) if col}
+        try:
+            max_torque = float(record.get("max_torque", ""))
+        except ValueError:
+            errors.append((line_no, f"Invalid max torque: {record.get('max_torque')!r}"))
+            continue
+        if not math.isfinite(max_torque) or max_torque <= 0:
+            errors.append((line_no, "Max torque must be a positive number."))
+            continue
+        if not record.get("type") or not record.get("unit"):
+            errors.append((line_no, "Type and unit are required."))
+            continue
+        applied_cells = [record.get(f"applied{i}", "") for i in range(1, 4)]
+        applied = None
+        if any(applied_cells):
+            try:
+                applied = tuple(float(v) for v in applied_cells)
+            except ValueError:
+                applied = None
+            if applied is None or not all(math.isfinite(v) for v in applied):
+                errors.append((line_no, "Applied torques must be numeric, or all left empty."))
+                continue
+            if not all(0 < v <= max_torque for v in applied):
+                errors.append((line_no, "Applied torques must be positive and not above the max torque."))
+                continue
+        valid.append({
+            "max_torque": max_torque,
+            "type": record["type"],
+            "unit": record["unit"],
+            "applied": applied
+        })
+    return valid, errors
+
+def build_torque_entries(rows: list, tolerance=DEFAULT_TOLERANCE) -> list:
+    """
+    Computes applied torques (where not given) and allowances for validated rows,
+    one column at a time, using the same rules as the Manage tab.
+    """
+    suggested = suggest_applied_torques_bulk([r["max_torque"] for r in rows], [r["type"] for r in rows])
+    applied_rows = [r["applied"] or s for r, s in zip(rows, suggested)]
+    allowance_rows = auto_calculate_allowances_bulk(applied_rows, tolerance)
+    entries = []
+    for row, applied, allowances in zip(rows, applied_rows, allowance_rows):
+        entries.append({
+            "max_torque": row["max_torque"],
+            "type": row["type"],
+            "unit": row["unit"],
+            "applied_torq": json.dumps(list(applied)),
+            "allowance1": allowances[0],
+            "allowance2": allowances[1],
+            "allowance3": allowances[2]
+        })
+    return entries
+
+def import_torque_csv(path: str, on_conflict: str = "skip", progress=None, db_file: str = DB_FILE) -> dict:
+    """
+    Imports a CSV torque catalog into the TorqueTable in one transaction.
+    Rows that fail validation are reported and not written. Returns the counts from
+    import_torque_table_entries plus an 'errors' list of (line_number, message).
+    """
+    with open(path, "r", encoding="utf-8-sig", newline="") as f:
+        rows, errors = parse_torque_rows(f)
+    entries = build_torque_entries(rows)
+    result = import_torque_table_entries(entries, on_conflict=on_conflict, progress=progress, db_file=db_file)
+    result["errors"] = errors
+    return result
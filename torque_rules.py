@@ -0,0 +1,34 @@
+# Fraction of max torque used for the three applied torques, per type.
+APPLIED_TORQUE_FACTORS = {
+    "torque multiplier": (0.3, 0.2, 0.1),
+}
+DEFAULT_APPLIED_TORQUE_FACTORS = (0.95, 0.65, 0.40)
+DEFAULT_TOLERANCE = 0.04
+
+def auto_calculate_allowances(applied_list, tolerance=DEFAULT_TOLERANCE):
+    """Given a list of floats, returns a list of strings formatted as 'low - high'."""
+    allowances = []
+    for val in applied_list:
+        low = val * (1 - tolerance)
+        high = val * (1 + tolerance)
+        allowances.append(f"{low:.1f} - {high:.1f}")
+    return allowances
+
+def suggest_applied_torques(max_torque: float, type_str: str) -> tuple:
+    """Returns suggested applied torque values based on max torque and type."""
+    factors = APPLIED_TORQUE_FACTORS.get(type_str.lower(), DEFAULT_APPLIED_TORQUE_FACTORS)
+    return tuple(round(max_torque * f, 1) for f in factors)
+
+def suggest_applied_torques_bulk(max_torques: list, types: list) -> list:
+    """
+    suggest_applied_torques for many entries at once.
+    Returns a list of 3-tuples in the same order as the inputs.
+    """
+    return [suggest_applied_torques(m, t) for m, t in zip(max_torques, types)]
+
+def auto_calculate_allowances_bulk(applied_rows: list, tolerance=DEFAULT_TOLERANCE) -> list:
+    """
+    auto_calculate_allowances for many entries at once: takes a list of applied torque
+    tuples and returns a list of allowance-string tuples.
+    """
+    return [tuple(auto_calculate_allowances(row, tolerance)) for row in applied_rows]